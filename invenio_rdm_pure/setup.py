@@ -22,14 +22,116 @@ days_keep_log = 30
 # Reduce the number of lines in data/successful_changes.txt
 lines_successful_changes = 90
 
-# Time gap between RDM post requests
-push_dist_sec = 0.8
-# Too many requests sent to RDM server (waits 15 minutes (900/60 = 15))
-# 429 is the HTTP response code
+# RDM RATE LIMIT
+# RDM accepts 5000 requests per hour, only write requests are paced
+rdm_requests_per_hour = 5000
+# Number of write requests that can be sent at once before pacing starts
+rdm_rate_burst = 10
+# Too many requests sent to RDM server (429 is the HTTP response code):
+# waits as asked by Retry-After, otherwise 5, 10, 20.. seconds
+backoff_429_base = 5
+# Longest wait after a 429 response (900/60 = 15 minutes)
 wait_429 = 900
+# Times a request is sent again after a 429 response
+retries_429 = 5
+
+# Recid of a new record not given in the POST response: search it after
+# 0.25, 0.5, 1, 2, 4 seconds (the record needs to be indexed first)
+recid_poll_delay = 0.25
+recid_poll_attempts = 5
+
+# HTTP CONNECTION POOLS
+# Number of hosts whose keep-alive connection pool is kept open
+http_pool_connections = 4
+# Maximum number of keep-alive connections kept open towards the Pure host
+pure_pool_maxsize = 16
+# Pure requests timeout in seconds (connect, read)
+pure_request_timeout = (10, 120)
+# Maximum number of keep-alive connections kept open towards the RDM host
+rdm_pool_maxsize = 16
+# RDM requests timeout in seconds (connect, read), file uploads can take long
+rdm_request_timeout = (10, 300)
+# Verify the RDM host certificate (the local instance uses a self signed one)
+rdm_verify_ssl = False
+
+# FILE TRANSFERS
+# Files are downloaded and uploaded in chunks, never held whole in memory
+file_transfer_chunk_size = 1024 * 1024
+# "disk": downloaded from Pure to the temporary files, then uploaded to RDM
+# "pipe": streamed from Pure straight into the RDM upload, without touching disk
+file_transfer_mode = "disk"
+# Files of a record transferred at once, and by all records together
+file_transfer_workers = 4
+file_transfer_global_limit = 8
+# A failed download or upload is tried again after ~1, 2.. sec. (randomized)
+file_transfer_attempts = 3
+file_transfer_retry_delay = 1
+file_transfer_retry_max_delay = 30
+# Files downloaded from Pure are kept by the digest given by Pure: a file sent
+# again (e.g. its record changed, or the transmission is retried) is not
+# downloaded again. The least recently used are removed beyond 20 GB.
+file_cache_max_size = 20 * 1024 ** 3
+
+# PURE PAGINATION
+# Pages of a Pure list (e.g. changes, research outputs of a person) requested
+# ahead while the current page is processed
+pure_prefetch_pages = 2
+
+# ASYNCHRONOUS PURE REQUESTS
+# With aiohttp installed (the "async" extra) the orcids and files of a record are
+# requested concurrently, at most pure_async_concurrency requests at once for
+# all threads. Without it they are requested one after the other.
+pure_async_requests = True
+pure_async_concurrency = 8
+
+# INITIAL SYNCHRONIZATION
+# Worker threads of each stage: fetch from Pure, store in RDM
+synchronizer_workers = {"fetch": 4, "store": 4}
+# Items that can wait before each stage, a full queue pauses the previous stage
+synchronizer_queue_size = {"fetch": 8, "store": 200}
+# Failed Pure requests are sent again after ~1, 2, 4.. sec. (randomized),
+# a series of research outputs is given up after pure_retry_attempts
+pure_retry_attempts = 5
+pure_retry_base_delay = 1
+pure_retry_max_delay = 60
+# Retries allowed on top of the requests of a synchronization (20 %)
+pure_retry_budget_ratio = 0.2
+
+# RDM DATABASE
+# Values bound at once in the "IN (...)" of a query, e.g. user ids
+database_in_batch_size = 500
+# Rows fetched at once when iterating over a large result
+database_fetch_size = 1000
+
+# RDM SEARCH
+# Hits requested per page when iterating over all the results of a search,
+# the next page is requested while the hits of the current one are processed
+rdm_search_page_size = 100
+# Elasticsearch does not page beyond its result window (index.max_result_window)
+rdm_search_max_results = 10000
+
+# GROUPS
+# Missing RDM roles (groups) are created together, up to roles_batch_size
+roles_batch_size = 50
+# Records of a split or merged group updated by concurrent PUT requests,
+# paced all together by the RDM rate limiter
+record_update_workers = 4
+# Updates failing with a connection error or 5xx are sent again after ~1, 2.. sec.
+record_update_attempts = 3
+record_update_retry_delay = 1
+record_update_retry_max_delay = 30
+# Progress of the updates reported every x records
+record_update_report_interval = 100
+
+# ORCID CACHE
+# The ORCID of a Pure person is requested again after a week,
+# a person without ORCID after a day
+orcid_cache_size = 20000
+orcid_cache_ttl = 7 * 24 * 3600
+orcid_cache_negative_ttl = 24 * 3600
 
 # OTHER
-iso6393_file_name = f"{dirpath}/source/iso6393.json"
+iso6393_file_name = f"{dirpath}/source/rdm/iso6393.json"
 pure_uuid_length = 36
 
 # Pure import
@@ -101,21 +203,32 @@ data_files_name = {
     "successful_changes": f"{base_path}/successful_changes.txt",
     "user_ids_match": f"{base_path}/user_ids_match.txt",
     "all_rdm_records": f"{base_path}/all_rdm_records.txt",
+    "rdm_records_index": f"{base_path}/rdm_records.db",
     "rdm_record_owners": f"{base_path}/rdm_record_owners.txt",
     "transfer_uuid_list": f"{base_path}/to_transmit.txt",
     "delete_recid_list": f"{base_path}/to_delete.txt",
+    "rdm_rate_limit": f"{base_path}/rdm_rate_limit.json",
+    "failed_research_outputs": f"{base_path}/failed_research_outputs.txt",
+    "synchronization_checkpoint": f"{base_path}/synchronization_checkpoint.db",
+    "orcid_cache": f"{base_path}/orcid_cache.json",
+    "file_cache": f"{base_path}/file_cache",
+    "payload_hashes": f"{base_path}/payload_hashes.db",
 }
 
 # TEMPORARY FILES (used to keep truck of the data received and transmitted)
 base_path = f"{dirpath}/data/temporary_files"
 temporary_files_name = {
     "base_path": f"{base_path}",
-    "get_pure_metadata": f"{base_path}/get_pure_metadata.json",
-    "get_rdm_metadata": f"{base_path}/get_rdm_metadata.json",
-    "post_rdm_response": f"{base_path}/post_rdm_response.json",
-    "post_rdm_metadata": f"{base_path}/post_rdm_metadata.json",
+    "debug_trace": f"{base_path}/debug_trace.jsonl.gz",
 }
 
+# DEBUG CAPTURE
+# Writes the Pure and RDM requests and responses to the compressed debug trace
+# (read it with zcat), from a background thread. If the thread falls behind by
+# more than debug_capture_queue_size requests, the next ones are not captured.
+debug_capture_enabled = False
+debug_capture_queue_size = 1000
+
 # Percentage of updated items to considere the upload task successful
 upload_percent_accept = 90
 
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Cache of remote lookups, persisted in the data/ directory."""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from .utils import check_if_directory_exists
+
+
+class LookupFailed(Exception):
+    """Raised by a loader when the value could not be looked up (not cached)."""
+
+
+class _Flight:
+    """Lookup in progress, shared by the threads asking for the same key."""
+
+    def __init__(self):
+        """Its value or error is set before the event."""
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class LookupCache:
+    """LRU cache of key -> value with an expiry time, e.g. person uuid -> ORCID.
+
+    A loader returning None means "not found", which is cached as well, for
+    *negative_ttl* seconds. Concurrent lookups of the same key wait for the
+    first one instead of sending the same request (single flight).
+    """
+
+    def __init__(
+        self,
+        file_name: str,
+        max_size: int,
+        ttl: float,
+        negative_ttl: float,
+        save_interval: int = 100,
+    ):
+        """The entries saved in *file_name* are loaded on first use.
+
+        The cache is saved every *save_interval* new entries, and by save().
+        """
+        self.file_name = file_name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.save_interval = save_interval
+        # key -> (value, expires)
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._loaded = False
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "coalesced": 0}
+
+    def get(self, key: str, loader: Callable[[str], Optional[str]]) -> Optional[str]:
+        """Cached value of *key*, looked up with *loader* when missing or expired.
+
+        If the loader failed (e.g. raised LookupFailed) its error is raised to
+        all the threads waiting for it, and nothing is cached.
+        """
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                if entry[0] is None:
+                    self._stats["negative_hits"] += 1
+                else:
+                    self._stats["hits"] += 1
+                return entry[0]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader(key)
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None:
+                    self._put(key, flight.value)
+                save = self._unsaved >= self.save_interval
+            flight.done.set()
+
+        if save:
+            self.save()
+        return flight.value
+
+    def contains(self, key: str) -> bool:
+        """True if the key has a value (or "not found") that did not expire."""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            return bool(entry) and entry[1] > time.time()
+
+    def put(self, key: str, value: Optional[str]):
+        """Adds a value looked up by other means, e.g. concurrent requests."""
+        with self._lock:
+            self._load()
+            self._put(key, value)
+            save = self._unsaved >= self.save_interval
+        if save:
+            self.save()
+
+    def stats(self) -> dict:
+        """Hits, negative hits, misses, coalesced lookups and size."""
+        with self._lock:
+            return dict(self._stats, size=len(self._entries))
+
+    def save(self):
+        """Writes the entries that did not expire to the file."""
+        with self._save_lock:
+            with self._lock:
+                if not self._loaded:
+                    return
+                now = time.time()
+                entries = [
+                    [key, value, expires]
+                    for key, (value, expires) in self._entries.items()
+                    if expires > now
+                ]
+                self._unsaved = 0
+
+            check_if_directory_exists(os.path.dirname(self.file_name))
+            temporary_file = f"{self.file_name}.tmp"
+            with open(temporary_file, "w") as fp:
+                json.dump(entries, fp)
+            os.replace(temporary_file, self.file_name)
+
+    def _put(self, key: str, value: Optional[str]):
+        """Adds an entry, evicting the least recently used beyond max_size."""
+        ttl = self.ttl if value is not None else self.negative_ttl
+        self._entries[key] = (value, time.time() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        self._unsaved += 1
+
+    def _load(self):
+        """Reads the saved entries, in least recently used order."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.isfile(self.file_name):
+            return
+        try:
+            with open(self.file_name) as fp:
+                entries = json.load(fp)
+        except ValueError:
+            # A broken cache file is just a cold cache
+            return
+        now = time.time()
+        for key, value, expires in entries[-self.max_size :]:
+            if expires > now:
+                self._entries[key] = (value, expires)
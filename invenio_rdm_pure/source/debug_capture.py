@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Trace of the requests sent to Pure and RDM, written when debugging."""
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from requests import Response
+
+from ..setup import (
+    debug_capture_enabled,
+    debug_capture_queue_size,
+    temporary_files_name,
+)
+from .utils import check_if_directory_exists
+
+
+class DebugCapture:
+    """Appends requests and responses to a gzip compressed JSON lines file.
+
+    The requesting threads only put the request in a bounded queue, a
+    background thread writes it. When the queue is full the request is not
+    captured (it is counted in 'dropped'), requests are never slowed down.
+    Nothing is done unless *enabled*.
+    """
+
+    # Put in the queue to wait until everything before it was written
+    _flush = object()
+    # Put in the queue to close the file
+    _close = object()
+
+    def __init__(self, file_name: str, enabled: bool, queue_size: int):
+        """The writing thread is started with the first captured request."""
+        self.file_name = file_name
+        self.enabled = enabled
+        self.dropped = 0
+        self._queue = queue.Queue(queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def add(self, name: str, url: str, response: Response, data=None):
+        """Captures a request and its response under *name* (e.g. 'rdm_post').
+
+        *data*: body of the request, if any.
+        """
+        if not self.enabled:
+            return
+        self._start()
+        entry = (
+            time.time(),
+            threading.current_thread().name,
+            name,
+            url,
+            response,
+            data,
+        )
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self):
+        """Waits until the captured requests are written."""
+        if self._thread:
+            done = threading.Event()
+            self._queue.put((self._flush, done))
+            done.wait()
+
+    def close(self):
+        """Writes the captured requests and closes the file (at exit)."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._queue.put((self._close, None))
+            thread.join()
+
+    def _start(self):
+        """Starts the writing thread, once."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._write, name="debug-capture", daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _write(self):
+        """Writes the captured requests, flushing when the queue is empty.
+
+        Every run appends a gzip member, gzip.open and zcat read them as one.
+        """
+        check_if_directory_exists(os.path.dirname(self.file_name))
+        with gzip.open(self.file_name, "at", encoding="utf-8") as fp:
+            while True:
+                entry = self._queue.get()
+                if entry[0] is self._close:
+                    return
+                if entry[0] is self._flush:
+                    fp.flush()
+                    entry[1].set()
+                    continue
+                fp.write(json.dumps(self._to_json(*entry)) + "\n")
+                if self._queue.empty():
+                    fp.flush()
+
+    @staticmethod
+    def _to_json(timestamp, thread, name, url, response, data) -> dict:
+        """Line of the trace."""
+        if isinstance(data, bytes):
+            data = data.decode("utf-8", "replace")
+        return {
+            "time": datetime.fromtimestamp(timestamp).isoformat(),
+            "thread": thread,
+            "name": name,
+            "url": url,
+            "request": data,
+            "status": response.status_code,
+            "response": response.content.decode("utf-8", "replace"),
+        }
+
+
+# Shared by all threads, see debug_capture_enabled in setup.py
+debug_capture = DebugCapture(
+    temporary_files_name["debug_trace"],
+    debug_capture_enabled,
+    debug_capture_queue_size,
+)
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Files kept by the digest of their content, verified while they are streamed."""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+from typing import Optional
+
+from ..setup import data_files_name, file_cache_max_size
+
+
+class DigestMismatch(Exception):
+    """Raised when the content of a file does not match its digest."""
+
+
+def hash_name(algorithm: str) -> Optional[str]:
+    """Name in hashlib of a digest algorithm given by Pure ('SHA-1' -> 'sha1')."""
+    if not algorithm:
+        return None
+    name = algorithm.lower().replace("-", "")
+    return name if name in hashlib.algorithms_available else None
+
+
+class DigestCheck:
+    """Hashes the chunks of a file while they are streamed, then checks the digest."""
+
+    def __init__(self, algorithm: str, digest: str):
+        """Nothing is checked if the algorithm is not supported."""
+        name = hash_name(algorithm)
+        self.digest = digest.lower() if digest else None
+        self._hash = hashlib.new(name) if name and digest else None
+
+    def update(self, chunk: bytes):
+        """Adds a chunk of the file."""
+        if self._hash:
+            self._hash.update(chunk)
+
+    def verify(self):
+        """Raises DigestMismatch if the chunks do not match the digest."""
+        if self._hash and self._hash.hexdigest() != self.digest:
+            raise DigestMismatch(
+                f"{self._hash.name} {self._hash.hexdigest()} instead of {self.digest}"
+            )
+
+
+class FileCache:
+    """Directory of files named after their digest, e.g. sha1/<digest>.
+
+    The least recently used files are removed once the cache exceeds
+    *max_size* bytes. A file is hard linked to and from the cache when
+    possible, otherwise it is copied.
+    """
+
+    def __init__(self, directory: str, max_size: int):
+        """The directory is created with the first file."""
+        self.directory = directory
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "added": 0}
+
+    def contains(self, algorithm: str, digest: str) -> bool:
+        """True if a file with the digest is cached."""
+        path = self._path(algorithm, digest)
+        return bool(path) and os.path.isfile(path)
+
+    def restore(self, algorithm: str, digest: str, file_path: str) -> bool:
+        """Puts the cached file at *file_path*, False if it is not cached."""
+        if not self.contains(algorithm, digest):
+            return False
+        path = self._path(algorithm, digest)
+        try:
+            # Recently used
+            os.utime(path)
+            _link(path, file_path)
+        except FileNotFoundError:
+            # Removed meanwhile
+            return False
+        with self._lock:
+            self._stats["hits"] += 1
+        return True
+
+    def add(self, file_path: str, algorithm: str, digest: str):
+        """Adds a file whose content matches the digest."""
+        path = self._path(algorithm, digest)
+        if not path:
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        _link(file_path, temporary_path)
+        os.replace(temporary_path, path)
+        with self._lock:
+            self._stats["added"] += 1
+            self._evict()
+
+    def stats(self) -> dict:
+        """Files taken from the cache, added to it, and its size in bytes."""
+        with self._lock:
+            return dict(self._stats, size=sum(size for _, size, _ in self._files()))
+
+    def _path(self, algorithm: str, digest: str) -> Optional[str]:
+        """Path of a file in the cache, None if its digest can not be used."""
+        name = hash_name(algorithm)
+        if not name or not digest or not re.fullmatch(r"[0-9a-fA-F]+", digest):
+            return None
+        return os.path.join(self.directory, name, digest.lower())
+
+    def _evict(self):
+        """Removes the least recently used files beyond max_size."""
+        files = sorted(self._files(), key=lambda file: file[2])
+        total = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if total <= self.max_size:
+                break
+            os.remove(path)
+            total -= size
+
+    def _files(self):
+        """Path, size and last use of the cached files."""
+        if not os.path.isdir(self.directory):
+            return []
+        files = []
+        for name in os.listdir(self.directory):
+            with os.scandir(os.path.join(self.directory, name)) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".tmp"):
+                        stat = entry.stat()
+                        files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+
+def _link(source: str, destination: str):
+    """Hard links *source* to *destination*, a copy on another file system."""
+    # Writing to an existing link would change the linked file too
+    if os.path.exists(destination):
+        os.remove(destination)
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+# Shared by all threads, files of the records downloaded from Pure
+file_cache = FileCache(data_files_name["file_cache"], file_cache_max_size)
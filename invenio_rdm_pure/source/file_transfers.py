@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Downloads and uploads of the files of a record, several at once."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from flask import current_app
+
+from ..setup import (
+    file_transfer_attempts,
+    file_transfer_global_limit,
+    file_transfer_retry_delay,
+    file_transfer_retry_max_delay,
+    file_transfer_workers,
+)
+from .retry import RetryPolicy
+
+
+class FileTransfers:
+    """Runs the file transfers of a record in parallel, within a global limit.
+
+    Up to *workers* files of a record are transferred at once, and at most
+    *global_limit* by all the threads together. A transfer is a function
+    returning True when done, False when it failed for good and None when it
+    can be tried again (e.g. connection error, 5xx), after the delays of
+    *retry_policy*.
+    """
+
+    def __init__(self, workers: int, global_limit: int, retry_policy: RetryPolicy):
+        """The counters are kept for each direction, e.g. download and upload."""
+        self.workers = workers
+        self.retry_policy = retry_policy
+        self._semaphore = threading.BoundedSemaphore(global_limit)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def run(
+        self, direction: str, transfers: List[Tuple[Callable[[], Optional[bool]], int]]
+    ) -> List[Optional[bool]]:
+        """Runs the transfers, given with their size in bytes.
+
+        Returns their results in the same order, None if all attempts failed.
+        """
+        if len(transfers) < 2:
+            return [self._transfer(direction, *transfer) for transfer in transfers]
+
+        app = current_app._get_current_object()
+
+        def transfer(item):
+            with app.app_context():
+                return self._transfer(direction, *item)
+
+        workers = min(self.workers, len(transfers))
+        with ThreadPoolExecutor(workers, thread_name_prefix="file") as executor:
+            return list(executor.map(transfer, transfers))
+
+    def stats(self) -> dict:
+        """Files, failures and bytes of each direction, throughput in bytes / sec.
+
+        The throughput counts the time during which at least one file of that
+        direction was being transferred.
+        """
+        with self._lock:
+            stats = {}
+            for direction, counters in self._stats.items():
+                busy = counters["busy"]
+                if counters["active"]:
+                    busy += time.time() - counters["busy_since"]
+                stats[direction] = {
+                    "files": counters["files"],
+                    "failed": counters["failed"],
+                    "bytes": counters["bytes"],
+                    "throughput": counters["bytes"] / busy if busy else 0,
+                }
+            return stats
+
+    def _transfer(self, direction: str, function: Callable, size: int):
+        """Transfers one file, again if it failed."""
+
+        def attempt():
+            with self._semaphore:
+                self._count(direction, started=True)
+                try:
+                    return function()
+                finally:
+                    self._count(direction, started=False)
+
+        result = self.retry_policy.call(attempt)
+        with self._lock:
+            counters = self._stats[direction]
+            if result:
+                counters["files"] += 1
+                counters["bytes"] += size
+            else:
+                counters["failed"] += 1
+        return result
+
+    def _count(self, direction: str, started: bool):
+        """Keeps track of the time during which files are transferred."""
+        now = time.time()
+        with self._lock:
+            counters = self._stats.setdefault(
+                direction,
+                {
+                    "files": 0,
+                    "failed": 0,
+                    "bytes": 0,
+                    "active": 0,
+                    "busy": 0.0,
+                    "busy_since": now,
+                },
+            )
+            if started:
+                if counters["active"] == 0:
+                    counters["busy_since"] = now
+                counters["active"] += 1
+            else:
+                counters["active"] -= 1
+                if counters["active"] == 0:
+                    counters["busy"] += now - counters["busy_since"]
+
+
+# Shared by all threads, the global limit applies to all the records
+file_transfers = FileTransfers(
+    file_transfer_workers,
+    file_transfer_global_limit,
+    RetryPolicy(
+        file_transfer_attempts, file_transfer_retry_delay, file_transfer_retry_max_delay
+    ),
+)
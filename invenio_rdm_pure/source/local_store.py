@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Base class of the local SQLite stores kept in the data/ directory."""
+
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+from .utils import check_if_directory_exists
+
+
+class LocalStore(ABC):
+    """SQLite database shared by threads and processes.
+
+    Every thread uses its own connection, created on first use. Subclasses
+    create their tables in _create_tables.
+    """
+
+    def __init__(self, db_file: str):
+        """The database is opened lazily, by the first thread using it."""
+        self.db_file = db_file
+        self._local = threading.local()
+        self._setup_lock = threading.Lock()
+        self._setup_done = False
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Connection of the current thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            check_if_directory_exists(os.path.dirname(self.db_file))
+            # Waits up to 30 sec. when another process is writing
+            connection = sqlite3.connect(self.db_file, timeout=30)
+            self._local.connection = connection
+            self._setup()
+        return connection
+
+    def _setup(self):
+        """Creates the tables, once per process."""
+        with self._setup_lock:
+            if self._setup_done:
+                return
+            with self.connection as connection:
+                self._create_tables(connection)
+            self._setup_done = True
+
+    @abstractmethod
+    def _create_tables(self, connection: sqlite3.Connection):
+        """Creates the tables of the store if they do not exist yet."""
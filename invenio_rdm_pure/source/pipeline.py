@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Multi-stage pipeline connected by bounded queues."""
+
+import queue
+import threading
+import time
+import traceback
+from contextlib import ExitStack
+from typing import Callable, Iterable, List, Optional
+
+
+class Stage:
+    """One step of a Pipeline, run by its own pool of worker threads.
+
+    *function* receives one item and returns an iterable of the items passed
+    on to the next stage (None if nothing is passed on).
+    *queue_size* is the number of items that can wait for this stage,
+    when the queue is full the stage before it pauses (backpressure).
+    """
+
+    def __init__(
+        self, name: str, function: Callable, workers: int = 1, queue_size: int = 100
+    ):
+        """The counters are updated by the workers while the pipeline runs."""
+        self.name = name
+        self.function = function
+        self.workers = workers
+        self.queue_size = queue_size
+        self.processed = 0
+        self.produced = 0
+        self.errors = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def add_counts(self, processed: int, produced: int, errors: int):
+        """Adds to the counters the result of one processed item."""
+        with self._lock:
+            self.processed += processed
+            self.produced += produced
+            self.errors += errors
+
+    def stats(self) -> dict:
+        """Counters of the stage, throughput in processed items per second."""
+        throughput = self.processed / self.elapsed if self.elapsed else 0
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "processed": self.processed,
+            "produced": self.produced,
+            "errors": self.errors,
+            "throughput": round(throughput, 2),
+        }
+
+
+class Pipeline:
+    """Streams items through a chain of stages running concurrently.
+
+    Every stage reads from its own bounded queue and writes to the queue of
+    the next stage, so that e.g. fetching, converting and storing records
+    overlap instead of running one after the other.
+    """
+
+    # Put in a queue once for each worker of the stage reading it
+    _end_of_stream = object()
+
+    def __init__(
+        self, stages: List[Stage], app=None, on_error: Optional[Callable] = None
+    ):
+        """*app*: Flask application whose context is pushed in every worker.
+
+        *on_error* is called with the name of the stage, the item and the
+        exception when a stage fails on an item, the item is then dropped.
+        Without it the traceback is printed.
+        """
+        self.stages = stages
+        self.app = app
+        self.on_error = on_error
+
+    def run(self, items: Iterable):
+        """Feeds the items to the first stage and waits until all stages are done."""
+        queues = [queue.Queue(stage.queue_size) for stage in self.stages]
+        remaining_workers = [stage.workers for stage in self.stages]
+        lock = threading.Lock()
+        start = time.time()
+
+        def work(index: int):
+            stage = self.stages[index]
+            input_queue = queues[index]
+            output_queue = queues[index + 1] if index + 1 < len(queues) else None
+
+            with self._app_context():
+                self._work(stage, input_queue, output_queue)
+            stage.elapsed = time.time() - start
+
+            # The last worker of a stage closes the stream of the next stage
+            with lock:
+                remaining_workers[index] -= 1
+                last_worker = remaining_workers[index] == 0
+            if last_worker and output_queue is not None:
+                for _ in range(self.stages[index + 1].workers):
+                    output_queue.put(self._end_of_stream)
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for count in range(stage.workers):
+                thread = threading.Thread(
+                    target=work, args=(index,), name=f"{stage.name}-{count}"
+                )
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+
+        for item in items:
+            queues[0].put(item)
+        for _ in range(self.stages[0].workers):
+            queues[0].put(self._end_of_stream)
+
+        for thread in threads:
+            thread.join()
+
+    def stats(self) -> List[dict]:
+        """Counters of all stages."""
+        return [stage.stats() for stage in self.stages]
+
+    def _work(self, stage: Stage, input_queue: queue.Queue, output_queue):
+        """Processes the items of a stage until the end of the stream."""
+        while True:
+            item = input_queue.get()
+            if item is self._end_of_stream:
+                return
+
+            try:
+                results = stage.function(item) or []
+            except Exception as error:
+                if self.on_error is None:
+                    traceback.print_exc()
+                else:
+                    self.on_error(stage.name, item, error)
+                stage.add_counts(1, 0, 1)
+                continue
+
+            produced = 0
+            if output_queue is not None:
+                for result in results:
+                    # Blocks while the next stage is busy (queue full)
+                    output_queue.put(result)
+                    produced += 1
+            stage.add_counts(1, produced, 0)
+
+    def _app_context(self):
+        """Application context for a worker thread (needed by current_app)."""
+        if self.app is None:
+            return ExitStack()
+        return self.app.app_context()
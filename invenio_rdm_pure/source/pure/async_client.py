@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Pure requests sent concurrently, from an asyncio event loop."""
+
+import asyncio
+import json
+import os
+import threading
+from typing import Coroutine, List, Optional
+
+from flask import current_app
+
+from ...setup import (
+    file_transfer_chunk_size,
+    pure_async_concurrency,
+    pure_request_timeout,
+    pure_retry_attempts,
+    pure_retry_base_delay,
+    pure_retry_max_delay,
+    temporary_files_name,
+)
+from ..file_cache import DigestCheck, DigestMismatch, file_cache
+from ..retry import RetryPolicy
+from .requests_pure import get_pure_url
+
+try:
+    import aiohttp
+except ImportError:
+    # Optional, installed with the "async" extra
+    aiohttp = None
+
+
+def get_pure_config() -> dict:
+    """Pure url and credentials, read from the configuration of the current app."""
+    config = current_app.config
+    return {
+        "api_url": config.get("PURE_API_URL"),
+        "api_key": config.get("PURE_API_KEY"),
+        "username": config.get("PURE_USERNAME"),
+        "password": config.get("PURE_PASSWORD"),
+    }
+
+
+class PureResponse:
+    """Status code and content of a Pure response, as in a requests Response."""
+
+    def __init__(self, status_code: int, content: bytes):
+        """The content is read completely before the connection is released."""
+        self.status_code = status_code
+        self.content = content
+
+    def __repr__(self):
+        """Same as a requests Response, e.g. in the reports."""
+        return f"<Response [{self.status_code}]>"
+
+
+class AsyncPureClient:
+    """Sends Pure requests concurrently, from an event loop in its own thread.
+
+    The loop, its aiohttp session and the semaphore limiting the requests in
+    flight are shared by all the threads calling run(). Requests failing with
+    a connection error, a timeout, 429 or 5xx are sent again after the delays
+    of *retry_policy*.
+
+    The coroutines take the Pure configuration (get_pure_config) as the app
+    context is not available in the loop thread.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        timeout: tuple,
+        retry_policy: RetryPolicy,
+        chunk_size: int = file_transfer_chunk_size,
+    ):
+        """*timeout*: connect and read timeout in seconds."""
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retry_policy = retry_policy
+        self.chunk_size = chunk_size
+        self._loop = None
+        self._session = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """False if aiohttp is not installed."""
+        return aiohttp is not None
+
+    def run(self, *coroutines: Coroutine) -> list:
+        """Runs the coroutines concurrently and waits for all their results.
+
+        The exception raised by a coroutine is returned as its result.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._gather(coroutines), self._get_loop()
+        )
+        return future.result()
+
+    def close(self):
+        """Closes the session and stops the loop."""
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._session:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result()
+            self._session = None
+        loop.call_soon_threadsafe(loop.stop)
+
+    async def get_pure_metadata(
+        self, config: dict, endpoint: str, identifier: str = "", parameters={}
+    ) -> PureResponse:
+        """Same request as requests_pure.get_pure_metadata."""
+        url = get_pure_url(config["api_url"], endpoint, identifier, parameters)
+        headers = {"api-key": config["api_key"], "Accept": "application/json"}
+        return await self._get(url, headers=headers)
+
+    async def get_pure_file(
+        self,
+        config: dict,
+        file_url: str,
+        file_name: str,
+        digest: str = None,
+        digest_algorithm: str = None,
+    ) -> PureResponse:
+        """Downloads a file to the temporary files, as requests_pure.get_pure_file.
+
+        The file is written chunk after chunk, its content is not kept. A file
+        not matching its digest raises DigestMismatch.
+        """
+        file_path = f"{temporary_files_name['base_path']}/{file_name}"
+        loop = asyncio.get_running_loop()
+
+        async def download(result) -> bytes:
+            digest_check = DigestCheck(digest_algorithm, digest)
+            # Might be a link to a file in the cache
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            with open(file_path, "wb") as fp:
+                async for chunk in result.content.iter_chunked(self.chunk_size):
+                    digest_check.update(chunk)
+                    await loop.run_in_executor(None, fp.write, chunk)
+            try:
+                digest_check.verify()
+            except DigestMismatch:
+                os.remove(file_path)
+                raise
+            return b""
+
+        auth = aiohttp.BasicAuth(config["username"], config["password"])
+        response = await self._get(file_url, download, auth=auth)
+        if response.status_code < 300:
+            await loop.run_in_executor(
+                None, file_cache.add, file_path, digest_algorithm, digest
+            )
+        return response
+
+    async def get_research_outputs(
+        self, config: dict, size: int, offset: int
+    ) -> Optional[List[dict]]:
+        """Series of research outputs, as requests_pure.get_research_outputs."""
+        parameters = {"size": size, "offset": offset}
+        response = await self.get_pure_metadata(
+            config, "research-outputs", "", parameters
+        )
+        if response.status_code != 200:
+            return None
+        return json.loads(response.content)["items"]
+
+    async def _get(self, url: str, read_content=None, **kwargs) -> PureResponse:
+        """Sends a GET request, again if it failed, within the concurrency limit.
+
+        *read_content*: coroutine function reading the content of a successful
+        response, by default it is read in memory.
+        """
+        response = None
+        for attempt in range(self.retry_policy.max_attempts):
+            if attempt > 0:
+                await asyncio.sleep(self.retry_policy.delay(attempt - 1))
+            try:
+                async with self._semaphore:
+                    async with self._session.get(url, **kwargs) as result:
+                        if result.status < 300 and read_content:
+                            content = await read_content(result)
+                        else:
+                            content = await result.read()
+                        response = PureResponse(result.status, content)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.retry_policy.max_attempts - 1:
+                    raise
+                continue
+            if response.status_code != 429 and response.status_code < 500:
+                break
+        return response
+
+    async def _gather(self, coroutines) -> list:
+        """Results of the coroutines, run in the loop thread."""
+        if self._session is None:
+            connect, read = self.timeout
+            timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+            self._session = aiohttp.ClientSession(timeout=timeout)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*coroutines, return_exceptions=True)
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop of the client, started on first use."""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                thread.start()
+            return self._loop
+
+
+# Shared by all threads, requests the orcids and files of the records concurrently
+pure_async_client = AsyncPureClient(
+    pure_async_concurrency,
+    pure_request_timeout,
+    RetryPolicy(pure_retry_attempts, pure_retry_base_delay, pure_retry_max_delay),
+)
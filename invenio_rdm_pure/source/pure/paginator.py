@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Pages of the Pure list endpoints, requested ahead of their processing."""
+
+import json
+import queue
+import threading
+from typing import Iterator, Optional, Tuple
+
+from flask import current_app
+from requests import Response
+
+from ...setup import pure_prefetch_pages
+from .requests_pure import get_next_page, get_pure_metadata
+
+
+class PurePaginator:
+    """Follows the 'next' navigation links of a Pure list endpoint.
+
+    A background thread requests the pages and keeps up to *prefetch* of them
+    in a bounded queue, so that the next pages are on their way while the
+    current one is processed.
+
+    If *parameters* has a 'page', the next page number is requested, otherwise
+    the last part of the 'next' link is the identifier of the next page (e.g.
+    the resumption token of 'changes').
+    """
+
+    # Put in the queue after the last page
+    _end_of_pages = object()
+
+    def __init__(
+        self,
+        endpoint: str,
+        identifier: str = "",
+        parameters: dict = None,
+        prefetch: int = pure_prefetch_pages,
+        max_pages: int = None,
+    ):
+        """*max_pages*: pages requested at most, all of them if None."""
+        self.endpoint = endpoint
+        self.identifier = identifier
+        self.parameters = dict(parameters or {})
+        self.prefetch = prefetch
+        self.max_pages = max_pages
+
+    def pages(self) -> Iterator[Tuple[Response, Optional[dict]]]:
+        """Yields the response of every page with its json, None if it failed.
+
+        A failed request is the last page. Pages are no longer requested once
+        the caller stops iterating.
+        """
+        if self.max_pages is not None and self.max_pages < 1:
+            return
+        app = current_app._get_current_object()
+        pages = queue.Queue(self.prefetch)
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._fetch, args=(app, pages, stop), daemon=True
+        )
+        thread.start()
+        try:
+            while True:
+                page = pages.get()
+                if page is self._end_of_pages:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+        finally:
+            stop.set()
+
+    def items(self) -> Iterator[dict]:
+        """Yields the items of all the pages."""
+        for _, resp_json in self.pages():
+            if resp_json is None:
+                return
+            yield from resp_json["items"]
+
+    def _fetch(self, app, pages: queue.Queue, stop: threading.Event):
+        """Requests the pages one after the other, until there is no next one."""
+        identifier, parameters = self.identifier, dict(self.parameters)
+        count = 0
+        last = self._end_of_pages
+        try:
+            with app.app_context():
+                while not stop.is_set():
+                    response = get_pure_metadata(self.endpoint, identifier, parameters)
+                    resp_json = None
+                    if response.status_code < 300:
+                        resp_json = json.loads(response.content)
+                    if not self._put(pages, stop, (response, resp_json)):
+                        return
+
+                    count += 1
+                    next_page = resp_json and get_next_page(resp_json)
+                    if not next_page or count == self.max_pages:
+                        break
+                    if "page" in parameters:
+                        parameters["page"] += 1
+                    else:
+                        identifier = next_page.split("/")[-1]
+        except Exception as error:
+            # Raised to the caller
+            last = error
+        self._put(pages, stop, last)
+
+    @staticmethod
+    def _put(pages: queue.Queue, stop: threading.Event, page) -> bool:
+        """Waits for a free place in the queue, False if the caller stopped."""
+        while not stop.is_set():
+            try:
+                pages.put(page, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
@@ -8,17 +8,33 @@
 """File description."""
 
 import json
-from typing import List
+from os import path, remove
+from typing import List, Optional
 
-import requests
 from flask import current_app
+from requests import RequestException, Response
 from requests.auth import HTTPBasicAuth
 
-from ...setup import temporary_files_name
+from ...setup import (
+    file_transfer_chunk_size,
+    http_pool_connections,
+    pure_pool_maxsize,
+    pure_request_timeout,
+    temporary_files_name,
+)
+from ..debug_capture import debug_capture
+from ..file_cache import DigestCheck, DigestMismatch, file_cache
 from ..reports import Reports
+from ..sessions import PooledSession
+from ..utils import check_if_directory_exists
 
 reports = Reports()
 
+# Shared by all threads, keeps the connections to Pure alive between requests
+pure_client = PooledSession(
+    http_pool_connections, pure_pool_maxsize, timeout=pure_request_timeout
+)
+
 
 def get_research_output_count(pure_api_key: str, pure_api_url: str) -> int:
     """Get the amount of available research outputs at /research-outputs endpoint.
@@ -31,7 +47,7 @@ def get_research_output_count(pure_api_key: str, pure_api_url: str) -> int:
         "accept": "application/json",
     }
     url = pure_api_url + "research-outputs"
-    response = requests.get(url, headers=headers)
+    response = pure_client.get(url, headers=headers)
     if response.status_code == 200:
         return int(json.loads(response.text)["count"])
     else:
@@ -40,13 +56,13 @@ def get_research_output_count(pure_api_key: str, pure_api_url: str) -> int:
 
 def get_research_outputs(
     pure_api_key: str, pure_api_url: str, size: int, offset: int
-) -> List[dict]:
+) -> Optional[List[dict]]:
     """Get a list of research outputs.
 
     Pure API identifies a series by the following parameters:
     The *size* parameter defines the length of the series.
     The *offset* parameter defines the offset of the series.
-    Return [] if the GET request is not OK.
+    Return None if the GET request is not OK.
     """
     headers = {
         "api-key": pure_api_key,
@@ -55,13 +71,13 @@ def get_research_outputs(
     url = pure_api_url + "research-outputs?size={}&offset={}".format(
         str(size), str(offset)
     )  # There are ca. 65300 research output entries in Pure (15.12.2020)
-    response = requests.get(url, headers=headers)
+    response = pure_client.get(url, headers=headers)
     if response.status_code == 200:
         response_json = json.loads(response.text)
         items = response_json["items"]
         return items
     else:
-        return []
+        return None
 
 
 def get_pure_metadata(endpoint, identifier="", parameters={}, review=True):
@@ -72,6 +88,21 @@ def get_pure_metadata(endpoint, identifier="", parameters={}, review=True):
         "Accept": "application/json",
     }
     pure_rest_api_url = current_app.config.get("PURE_API_URL")
+    url = get_pure_url(pure_rest_api_url, endpoint, identifier, parameters)
+
+    # Sending request
+    response = pure_client.get(url, headers=headers)
+
+    if response.status_code >= 300 and review:
+        reports.add(response.content)
+
+    debug_capture.add("pure_get", url, response)
+
+    return response
+
+
+def get_pure_url(pure_rest_api_url, endpoint, identifier="", parameters={}):
+    """Url of a Pure endpoint, with the identifier and parameters of the request."""
     url = f"{pure_rest_api_url}{endpoint}/"
 
     # Identifies a person, research_output or date
@@ -86,38 +117,64 @@ def get_pure_metadata(endpoint, identifier="", parameters={}, review=True):
             url += f"{key}={parameters[key]}&"
 
     # Removes the last character
-    url = url[:-1]
-
-    # Sending request
-    response = requests.get(url, headers=headers)
-
-    if response.status_code >= 300 and review:
-        reports.add(response.content)
+    return url[:-1]
 
-    # Add response content to pure_get_uuid_metadata.json
-    open(temporary_files_name["get_pure_metadata"], "wb").write(response.content)
-
-    return response
 
+def get_pure_file(
+    file_url: str, file_name: str, digest: str = None, digest_algorithm: str = None
+):
+    """Downloads a file from Pure to the temporary files, chunk after chunk.
 
-def get_pure_file(file_url: str, file_name: str):
-    """Description."""
-    # Get request to Pure
-    pure_username = current_app.config.get("PURE_USERNAME")
-    pure_password = current_app.config.get("PURE_PASSWORD")
-    response = requests.get(file_url, auth=HTTPBasicAuth(pure_username, pure_password))
+    The chunks are checked against the *digest* given by Pure while they are
+    written, a file matching it is added to the file cache.
+    Returns None if the download failed but can be tried again.
+    """
+    try:
+        response = open_pure_file(file_url)
+    except RequestException as error:
+        reports.add(f"Error getting the file {file_url} from Pure: {error}")
+        return None
 
     if response.status_code >= 300:
+        response.close()
         reports.add(f"Error getting the file {file_url} from Pure")
-        return False
+        return None if response.status_code >= 500 else False
 
     # Save file
     base_path = temporary_files_name["base_path"]
-    open(f"{base_path}/{file_name}", "wb").write(response.content)
-
+    check_if_directory_exists(base_path)
+    file_path = f"{base_path}/{file_name}"
+    digest_check = DigestCheck(digest_algorithm, digest)
+    # Might be a link to a file in the cache
+    if path.exists(file_path):
+        remove(file_path)
+    try:
+        with response, open(file_path, "wb") as fp:
+            for chunk in response.iter_content(file_transfer_chunk_size):
+                digest_check.update(chunk)
+                fp.write(chunk)
+        digest_check.verify()
+    except (RequestException, DigestMismatch) as error:
+        remove(file_path)
+        reports.add(f"Error getting the file {file_url} from Pure: {error}")
+        return None
+
+    try:
+        file_cache.add(file_path, digest_algorithm, digest)
+    except OSError as error:
+        reports.add(f"Error adding the file {file_name} to the file cache: {error}")
     return response
 
 
+def open_pure_file(file_url: str) -> Response:
+    """Requests a file from Pure, its content is read while it is used."""
+    pure_username = current_app.config.get("PURE_USERNAME")
+    pure_password = current_app.config.get("PURE_PASSWORD")
+    return pure_client.get(
+        file_url, auth=HTTPBasicAuth(pure_username, pure_password), stream=True
+    )
+
+
 def get_pure_record_metadata_by_uuid(uuid: str):
     """Method used to get from Pure record's metadata."""
     # PURE REQUEST
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Token bucket rate limiter shared by threads and processes."""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from .utils import check_if_directory_exists
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+
+class RateLimiter:
+    """Token bucket that paces requests towards a rate limited API.
+
+    The bucket state is kept in a small json file, locked while it is read and
+    updated, so that every thread and every process using the same file draws
+    from the same budget. The server's view of the budget, given through the
+    ``X-RateLimit-*`` and ``Retry-After`` headers, overrides the local one.
+    """
+
+    def __init__(
+        self,
+        state_file: str,
+        requests_per_hour: int,
+        burst: int,
+        backoff_base: float,
+        backoff_max: float,
+    ):
+        """Sets the budget, e.g. 5000 requests per hour with bursts of 10."""
+        self.state_file = state_file
+        self.lock_file = f"{state_file}.lock"
+        self.rate = requests_per_hour / 3600
+        self.burst = burst
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._thread_lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available and takes it."""
+        while True:
+            with self._locked_state() as state:
+                now = time.time()
+                self._refill(state, now)
+                if now >= state["blocked_until"] and state["tokens"] >= 1:
+                    state["tokens"] -= 1
+                    return
+                wait = max(
+                    state["blocked_until"] - now, (1 - state["tokens"]) / self.rate
+                )
+            time.sleep(wait)
+
+    def update(self, response):
+        """Aligns the bucket to the rate limit headers of a response."""
+        headers = response.headers
+        remaining = self._header_number(headers, "X-RateLimit-Remaining")
+        reset = self._header_number(headers, "X-RateLimit-Reset")
+        if remaining is None and response.status_code != 429:
+            return
+
+        with self._locked_state() as state:
+            self._refill(state, time.time())
+            if remaining is not None:
+                state["tokens"] = min(state["tokens"], remaining)
+                # Budget exhausted, nothing can be sent before the window resets
+                if remaining < 1 and reset:
+                    state["blocked_until"] = max(state["blocked_until"], reset)
+
+    def backoff(self, response, attempt: int) -> float:
+        """Blocks the bucket after a 429 response and returns the seconds to wait.
+
+        Retry-After is used when given, otherwise the delay grows exponentially
+        with the number of attempts, up to backoff_max.
+        """
+        delay = self._retry_after(response.headers)
+        if delay is None:
+            delay = self.backoff_base * 2 ** attempt
+        delay = min(delay, self.backoff_max)
+
+        with self._locked_state() as state:
+            state["tokens"] = 0
+            state["blocked_until"] = max(state["blocked_until"], time.time() + delay)
+        return delay
+
+    def _refill(self, state: dict, now: float):
+        """Adds the tokens accumulated since the last update."""
+        elapsed = max(now - state["updated"], 0)
+        state["tokens"] = min(self.burst, state["tokens"] + elapsed * self.rate)
+        state["updated"] = now
+
+    @contextmanager
+    def _locked_state(self):
+        """Reads the shared state and writes it back once the caller is done."""
+        check_if_directory_exists(os.path.dirname(self.state_file))
+        with self._thread_lock, open(self.lock_file, "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                state = self._read_state()
+                yield state
+                with open(self.state_file, "w") as fp:
+                    json.dump(state, fp)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_state(self) -> dict:
+        """Loads the bucket state shared with the other processes."""
+        try:
+            with open(self.state_file) as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            # First run (or unreadable file): the bucket starts full
+            return {"tokens": self.burst, "updated": time.time(), "blocked_until": 0}
+
+    @staticmethod
+    def _header_number(headers, name: str):
+        """Numeric value of a header, None if missing or invalid."""
+        try:
+            return float(headers[name])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _retry_after(headers):
+        """Retry-After header in seconds, given either as seconds or as http date."""
+        value = headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
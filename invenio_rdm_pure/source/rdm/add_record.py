@@ -8,32 +8,50 @@
 """File description."""
 
 import json
-import time
+from functools import partial
+
+from sqlalchemy.exc import SQLAlchemyError
 
 from ...setup import (
     accessright_pure_to_rdm,
     data_files_name,
-    iso6393_file_name,
+    file_transfer_mode,
+    orcid_cache_negative_ttl,
+    orcid_cache_size,
+    orcid_cache_ttl,
     possible_record_restrictions,
+    pure_async_requests,
     resourcetype_pure_to_rdm,
+    temporary_files_name,
     versioning_running,
 )
+from ..cache import LookupCache, LookupFailed
+from ..file_cache import file_cache
+from ..file_transfers import file_transfers
+from ..pure.async_client import PureResponse, get_pure_config, pure_async_client
 from ..pure.requests_pure import (
     get_pure_file,
     get_pure_metadata,
     get_pure_record_metadata_by_uuid,
 )
 from ..rdm.database import RdmDatabase
+from ..rdm.delete_record import Delete
+from ..rdm.languages import get_iso6393_code
+from ..rdm.payload_hashes import payload_hash, payload_hashes
+from ..rdm.record_index import record_index
 from ..rdm.requests_rdm import Requests
-from ..rdm.run.groups import RdmGroups
+from ..rdm.roles import role_cache
+from ..rdm.user_ids_match import user_ids_match
 from ..rdm.versioning import Versioning
 from ..reports import Reports
-from ..utils import (
-    check_if_file_exists,
-    file_read_lines,
-    get_userid_from_list_by_externalid,
-    get_value,
-    shorten_file_name,
+from ..utils import add_spaces, check_if_file_exists, get_value, shorten_file_name
+
+# Person uuid -> ORCID, shared by all RdmAddRecord instances and kept across runs
+orcid_cache = LookupCache(
+    data_files_name["orcid_cache"],
+    orcid_cache_size,
+    orcid_cache_ttl,
+    orcid_cache_negative_ttl,
 )
 
 
@@ -44,9 +62,9 @@ class RdmAddRecord:
         """Description."""
         self.rdm_requests = Requests()
         self.report = Reports()
-        self.groups = RdmGroups()
         self.versioning = Versioning()
         self.rdm_db = RdmDatabase()
+        self.delete = Delete()
 
     def push_record_by_uuid(self, global_counters: dict, uuid: str):
         """Gets from Pure the metadata of a given uuid."""
@@ -70,12 +88,20 @@ class RdmAddRecord:
             # Stores the name of the record files
             # Necessary because we need first to create the record and then to put the files
             self.record_files = []
+            # Files piped from Pure to RDM, file name -> url, digest, digest algorithm
+            self.piped_files = {}
+            # Files to download: name, url, digest, digest algorithm, match review
+            self.pending_downloads = []
+            # Size in bytes given by Pure, file name -> size
+            self.file_sizes = {}
+            # File name -> digest and size given by Pure, part of the payload hash
+            self.file_digests = {}
 
             # Stores all extra fields that are not in the standard RDM datamodel
             self.pure_extensions = {}
 
             # Decorated function
-            func(self, global_counters, item)
+            return func(self, global_counters, item)
 
         return _wrapper
 
@@ -118,6 +144,9 @@ class RdmAddRecord:
         # Title
         self._add_title()
 
+        # Requests the orcids of the record at once
+        self._request_orcids()
+
         # Person Associations
         self._process_person_associations()
 
@@ -153,14 +182,28 @@ class RdmAddRecord:
         # Add pure_extensions to the data to be submitted
         self.data["extensions"] = self.pure_extensions
 
+        # Stored in the local record index
+        self.metadata_version = self.data.get("metadataVersion")
+
+        # Records unchanged since they were last sent are not sent again
+        self.payload_hash = payload_hash(self.data, self.file_digests)
+        if self._payload_unchanged():
+            return True
+
+        # Downloads the files of the record, several at once
+        self._download_files()
+
         # Convert to json string
         self.data = json.dumps(self.data)
 
         # Post request to RDM
-        self._post_metadata()
+        successful = self._post_metadata()
+        if successful:
+            payload_hashes.set(self.uuid, self.payload_hash)
 
         # Updates the versioning data of all records with the same uuid
         self._update_all_uuid_versions()
+        return successful
 
     def _access_right_and_restrictions(self, item):
         """Description."""
@@ -322,8 +365,6 @@ class RdmAddRecord:
 
         self.data["creators"] = []
 
-        file_data = file_read_lines("user_ids_match")
-
         for item in self.item["personAssociations"]:
 
             self.sub_data = {}
@@ -341,7 +382,7 @@ class RdmAddRecord:
             )
             self._add_field_sub(item, "identifiers", "uuid", ["externalPerson", "uuid"])
             # Orcid
-            self._process_contributor_orcid()
+            self._process_contributor_orcid(item)
 
             # Affiliations
             self.sub_data["affiliations"] = []
@@ -363,8 +404,12 @@ class RdmAddRecord:
 
             # Checks if the record owner is available in user_ids_match.txt
             person_external_id = get_value(item, ["person", "externalId"])
-            owner = get_userid_from_list_by_externalid(person_external_id, file_data)
+            owner = user_ids_match.get_user_id(person_external_id)
             if owner and int(owner) not in self.data["_owners"]:
+                self.report.add(
+                    f"\tRDM owner list @@ User id:     {add_spaces(owner)} "
+                    f"@ externalId: {person_external_id}"
+                )
                 self.data["_owners"].append(int(owner))
 
             # Append person to creators
@@ -390,17 +435,14 @@ class RdmAddRecord:
 
         self.sub_data["name"] = f"{first_name} {last_name}"
 
-    def _process_contributor_orcid(self):
-        """Description."""
-        if "uuid" in self.sub_data:
-            person_uuid = self.sub_data["uuid"]
+    def _process_contributor_orcid(self, item: dict):
+        """Adds the orcid of a person association to its identifiers."""
+        if "uuid" in self.sub_data["identifiers"]:
+            person_uuid = self.sub_data["identifiers"]["uuid"]
             person_name = self.sub_data["name"]
 
             # External persons are not present in 'persons' Pure API endpoint
-            if (
-                "type_p" in self.sub_data
-                and self.sub_data["type_p"] == "External person"
-            ):
+            if "externalPerson" in item:
                 report = f"\tPure get orcid @@ External person @ {person_uuid} @ {person_name}"
                 self.report.add(report)
             else:
@@ -425,10 +467,18 @@ class RdmAddRecord:
                 # Adding organisational unit as group owner
                 self.data["group_restrictions"].append(organisational_unit_externalId)
 
-                # Create group
-                self.groups.rdm_create_group(
+                # Group to create, unless it exists
+                if role_cache.add(
                     organisational_unit_externalId, organisational_unit_name
-                )
+                ):
+                    report = f"\tNew group @@ External id: {organisational_unit_externalId} @ {organisational_unit_name}"
+                    self.report.add(report)
+
+            # Creates the new groups of the record at once
+            try:
+                role_cache.flush()
+            except SQLAlchemyError as error:
+                self.report.add(f"\tNew group check @@ Error: {error}")
 
     def _applied_restrictions_check(self):
         """Checks if the restrictions applied to the record are valid.
@@ -446,8 +496,19 @@ class RdmAddRecord:
                 self.report.add(report)
         return True
 
-    def _post_metadata(self):
-        """Submits the created json to RDM."""
+    def _payload_unchanged(self) -> bool:
+        """True if the same payload was already sent and its record is in RDM."""
+        if payload_hashes.get(self.uuid) != self.payload_hash:
+            return False
+        if not record_index.get_recids(self.uuid):
+            return False
+
+        self.report.add(f"\tRDM unchanged @ Not sent again @ Uuid: {self.uuid}")
+        self.global_counters["unchanged"] += 1
+        return True
+
+    def _post_metadata(self) -> bool:
+        """Submits the created json to RDM, True if metadata and files were stored."""
         uuid = self.item["uuid"]
         success_check = {"metadata": False, "file": False}
 
@@ -460,22 +521,26 @@ class RdmAddRecord:
 
         success_check["metadata"] = True
 
-        # After pushing a record's metadata to RDM it takes about one second to be able to get its recid
-        time.sleep(1)
-
-        # Gets recid from RDM
-        recid = self.rdm_requests.get_recid(uuid, self.global_counters)
+        # The recid of the new record is in the POST response
+        recid = self.rdm_requests.get_recid_from_response(response)
+        if not recid:
+            # Otherwise it is searched for, once the record is indexed
+            recid = self.rdm_requests.wait_for_recid(uuid)
         if not recid:
             return False
 
-        # add record to all_rdm_records.txt
-        open(data_files_name["all_rdm_records"], "a").write(f"{uuid} {recid}\n")
+        # Older records with the same uuid are replaced by the new one
+        self._delete_older_records(uuid, recid)
 
-        # Submit record FILES
-        for file_name in self.record_files:
+        # add record to the local record index
+        record_index.add(uuid, recid, self.metadata_version)
 
-            # Submit request
-            response = self.rdm_requests.rdm_add_file(file_name, recid)
+        # Submit record FILES, several at once
+        uploads = [
+            (partial(self._upload_file, file_name, recid), self.file_sizes[file_name])
+            for file_name in self.record_files
+        ]
+        for response in file_transfers.run("upload", uploads):
             # Process response
             successful = self._process_file_response(response, success_check)
 
@@ -488,6 +553,32 @@ class RdmAddRecord:
 
         # Checks if both metadata and files were correctly transmitted
         self._metadata_and_file_submission_check(success_check)
+        return all(success_check.values())
+
+    def _upload_file(self, file_name: str, recid: str):
+        """Uploads a file to the record, downloaded or piped from Pure."""
+        if file_name in self.piped_files:
+            file_url, digest, digest_algorithm = self.piped_files[file_name]
+            return self.rdm_requests.rdm_pipe_file(
+                file_url, file_name, recid, digest, digest_algorithm
+            )
+        return self.rdm_requests.rdm_add_file(file_name, recid)
+
+    def _delete_older_records(self, uuid: str, recid: str):
+        """Deletes the records in the local record index with the same uuid."""
+        # If versioning is running then older versions of the record are kept
+        if versioning_running:
+            return
+
+        for old_recid in record_index.get_recids(uuid):
+            if old_recid == recid:
+                continue
+
+            response = self.delete.record(old_recid)
+            if response.status_code < 300 or response.status_code == 410:
+                self.global_counters["delete"]["success"] += 1
+            else:
+                self.global_counters["delete"]["error"] += 1
 
     def _process_post_response(self, response: object, uuid: str):
         """Description."""
@@ -547,15 +638,8 @@ class RdmAddRecord:
         if pure_language == "Undefined/Unknown":
             return False
 
-        # Read iso6393 json file
-        resp_json = json.load(open(iso6393_file_name, "r"))
-
-        for i in resp_json:
-            if i["name"] == pure_language:
-                return i["iso6393"]
-
         # in case there is no match (e.g. spelling mistake in Pure) ignore field
-        return False
+        return get_iso6393_code(pure_language) or False
 
     def _get_rdm_file_review(self):
         """
@@ -563,9 +647,10 @@ class RdmAddRecord:
 
         if the new file from Pure is the same as the old file in RDM.
 
-        To do so it makes a comparison on the file size.
+        To do so it makes a comparison on the file digest, or on the file size
+        and name when the digest is not known.
 
-        If the size is not the same, then it will be uploaded to RDM.
+        If the file is not the same, then it will be uploaded to RDM.
 
         and a new internal review will be required.
         """
@@ -595,9 +680,31 @@ class RdmAddRecord:
                     file_review = file["internalReview"]
                     file_name = file["name"]
                     self.rdm_file_review.append(
-                        {"size": file_size, "review": file_review, "name": file_name}
+                        {
+                            "size": file_size,
+                            "review": file_review,
+                            "name": file_name,
+                            "digest": file.get("digest"),
+                            "digestAlgorithm": file.get("digestAlgorithm"),
+                        }
                     )
 
+        # Digest of the file sent with the record, kept in its extensions
+        extensions = record.get("extensions", {})
+        if extensions.get("tug:file_digest"):
+            for rdm_file in self.rdm_file_review:
+                if rdm_file["name"] == extensions.get("tug:file_name"):
+                    break
+            else:
+                rdm_file = {
+                    "size": None,
+                    "review": extensions.get("tug:file_internalReview", False),
+                    "name": extensions.get("tug:file_name"),
+                }
+                self.rdm_file_review.append(rdm_file)
+            rdm_file["digest"] = extensions["tug:file_digest"]
+            rdm_file["digestAlgorithm"] = extensions.get("tug:file_digestAlgorithm")
+
     def get_files_data(self, item: dict):
         """Gets metadata information from electronicVersions and additionalFiles files.
 
@@ -613,16 +720,17 @@ class RdmAddRecord:
         pure_file_size = get_value(item, ["file", "size"])
         file_name = get_value(item, ["file", "fileName"])
         file_url = get_value(item, ["file", "fileURL"])
+        digest = get_value(item, ["file", "digest"])
+        digest_algorithm = get_value(item, ["file", "digestAlgorithm"])
 
         self.pure_rdm_file_match = []
 
-        # Checks if pure_file_size and file_name are the same as any of the files in RDM with the same uuid
+        # Checks if the file is the same as any of the files in RDM with the same uuid
         for rdm_file in self.rdm_file_review:
 
-            rdm_file_size = str(rdm_file["size"])
             rdm_review = rdm_file["review"]
 
-            if pure_file_size == rdm_file_size and file_name == rdm_file["name"]:
+            if self._same_file(item, rdm_file):
                 self.pure_rdm_file_match.append(True)  # Do the old and new file match?
                 self.pure_rdm_file_match.append(
                     rdm_review
@@ -647,10 +755,68 @@ class RdmAddRecord:
         value = get_value(item, ["accessTypes", 0, "value"])
         self.sub_data["accessType"] = self._accessright_conversion(value)
 
-        # Download file from Pure
-        response = get_pure_file(file_url, file_name)
+        file_path = f"{temporary_files_name['base_path']}/{file_name}"
+        self.file_sizes[file_name] = int(pure_file_size or 0)
+        self.file_digests[file_name] = (digest, self.file_sizes[file_name])
+
         # Checks if the file is already in RDM, and if it has already been reviewed
-        self._process_file_download_response(response, file_name)
+        match_review = self._file_match_review()
+
+        if file_cache.restore(digest_algorithm, digest, file_path):
+            # Same content as a file downloaded before
+            response = "File cache"
+        elif file_transfer_mode == "pipe":
+            # Streamed from Pure to RDM once the record is created
+            self.piped_files[file_name] = (file_url, digest, digest_algorithm)
+            response = "Piped to RDM"
+        else:
+            # Downloaded together with the other files of the record
+            self.pending_downloads.append(
+                (file_name, file_url, digest, digest_algorithm, match_review)
+            )
+            return
+        self._report_file_download(response, file_name, match_review)
+
+    @staticmethod
+    def _same_file(item: dict, rdm_file: dict) -> bool:
+        """Compares the digests, or the sizes and names if either has no digest."""
+        digest = get_value(item, ["file", "digest"])
+        digest_algorithm = get_value(item, ["file", "digestAlgorithm"])
+        if digest and rdm_file.get("digest"):
+            rdm_algorithm = rdm_file.get("digestAlgorithm")
+            if digest_algorithm and rdm_algorithm and digest_algorithm != rdm_algorithm:
+                return False
+            return digest.lower() == rdm_file["digest"].lower()
+
+        pure_file_size = get_value(item, ["file", "size"])
+        file_name = get_value(item, ["file", "fileName"])
+        return (
+            pure_file_size == str(rdm_file["size"]) and file_name == rdm_file["name"]
+        )
+
+    def _download_files(self):
+        """Downloads from Pure the files of the record, several at once.
+
+        The files are requested concurrently if possible, those that failed or
+        without aiohttp are downloaded by the file transfers.
+        """
+        responses = self._request_pure_files()
+        downloads = []
+        for index, pending in enumerate(self.pending_downloads):
+            if responses[index]:
+                continue
+            file_name, file_url, digest, digest_algorithm, _ = pending
+            download = partial(
+                get_pure_file, file_url, file_name, digest, digest_algorithm
+            )
+            downloads.append((index, download, self.file_sizes[file_name]))
+        results = file_transfers.run("download", [item[1:] for item in downloads])
+        for (index, _, _), response in zip(downloads, results):
+            responses[index] = response
+
+        for pending, response in zip(self.pending_downloads, responses):
+            file_name, match_review = pending[0], pending[-1]
+            self._report_file_download(response, file_name, match_review)
 
     def _add_subdata(self, item: list, rdm_field: str, path: list):
         """Adds the field to sub_data."""
@@ -658,7 +824,7 @@ class RdmAddRecord:
         if value:
             self.sub_data[rdm_field] = value
 
-    def _process_file_download_response(self, response, file_name):
+    def _file_match_review(self) -> str:
         """Checks if the file is already in RDM, and if it has already been reviewed."""
         # If the file is not in RDM
         if len(self.pure_rdm_file_match) == 0:
@@ -673,7 +839,10 @@ class RdmAddRecord:
             match_review = "Match: T, Review: F"
             if self.pure_rdm_file_match[1]:
                 match_review = "Match: T, Review: T"
+        return match_review
 
+    def _report_file_download(self, response, file_name: str, match_review: str):
+        """Reports the download of a file, to be uploaded once the record is created."""
         file_name_report = shorten_file_name(file_name)
 
         report = f"\tPure get file @ {response} @ {match_review} @ {file_name_report}"
@@ -681,31 +850,92 @@ class RdmAddRecord:
 
         self.record_files.append(file_name)
 
-    def _get_orcid(self, person_uuid: str, name: str):
-        """Gets from pure a person orcid."""
-        # Pure request
-        response = get_pure_metadata("persons", person_uuid, {}, False)
+    def _request_orcids(self):
+        """Requests concurrently the orcids of the record, if possible.
 
-        message = f"\tPure get orcid @ {response} @"
+        The orcids are added to the orcid cache, ready for the person
+        associations processed afterwards. Without aiohttp they are requested
+        there, one after the other.
+        """
+        if not pure_async_requests or not pure_async_client.available:
+            return
 
-        # Error
-        if response.status_code >= 300:
-            self.report.add(f"{message} Error: {response.content}")
-            return False
+        # External persons are not present in 'persons' Pure API endpoint
+        person_uuids = {
+            get_value(item, ["person", "uuid"])
+            for item in self.item.get("personAssociations", [])
+            if "externalPerson" not in item
+        }
+        person_uuids = [
+            uuid for uuid in person_uuids if uuid and not orcid_cache.contains(uuid)
+        ]
+        if len(person_uuids) < 2:
+            return
 
-        # Load json
-        resp_json = json.loads(response.content)
+        config = get_pure_config()
+        responses = pure_async_client.run(
+            *[
+                pure_async_client.get_pure_metadata(config, "persons", uuid)
+                for uuid in person_uuids
+            ]
+        )
+        # Failed requests are sent again one by one
+        for uuid, response in zip(person_uuids, responses):
+            if isinstance(response, PureResponse) and response.status_code < 300:
+                orcid_cache.put(uuid, json.loads(response.content).get("orcid"))
+
+    def _request_pure_files(self) -> list:
+        """Requests concurrently the files to download, if possible.
+
+        Returns the responses in the order of the pending downloads, None for
+        the files not requested or whose request failed.
+        """
+        responses = [None] * len(self.pending_downloads)
+        if not pure_async_requests or not pure_async_client.available:
+            return responses
+        if len(self.pending_downloads) < 2:
+            return responses
+
+        config = get_pure_config()
+        results = pure_async_client.run(
+            *[
+                pure_async_client.get_pure_file(
+                    config, file_url, file_name, digest, digest_algorithm
+                )
+                for file_name, file_url, digest, digest_algorithm, _ in (
+                    self.pending_downloads
+                )
+            ]
+        )
+        for index, response in enumerate(results):
+            if isinstance(response, PureResponse) and response.status_code < 300:
+                responses[index] = response
+        return responses
+
+    def _get_orcid(self, person_uuid: str, name: str):
+        """Gets a person orcid, from the orcid cache or else from Pure."""
+        try:
+            orcid = orcid_cache.get(person_uuid, self._request_orcid)
+        except LookupFailed as error:
+            self.report.add(f"\tPure get orcid @ Error: {error}")
+            return False
 
-        # Read orcid
-        if "orcid" in resp_json:
-            orcid = resp_json["orcid"]
-            self.report.add(f"{message} {orcid} @ {person_uuid} @ {name}")
+        if orcid:
+            self.report.add(f"\tPure get orcid @ {orcid} @ {person_uuid} @ {name}")
             return orcid
 
         # Not found
-        self.report.add(f"{message} Orcid not found @ {person_uuid} @ {name}")
+        self.report.add(f"\tPure get orcid @ Orcid not found @ {person_uuid} @ {name}")
         return False
 
+    @staticmethod
+    def _request_orcid(person_uuid: str):
+        """Gets from pure a person orcid, None if the person has none."""
+        response = get_pure_metadata("persons", person_uuid, {}, False)
+        if response.status_code >= 300:
+            raise LookupFailed(f"{response} {response.content}")
+        return json.loads(response.content).get("orcid")
+
     def _metadata_and_file_submission_check(self, success_check: dict):
         """Checks if both metadata and files were correctly transmitted."""
         if success_check["metadata"] is True and success_check["file"] is True:
@@ -6,34 +6,14 @@
 # under the terms of the MIT License; see LICENSE file for more details.
 
 """Converter Module to facilitate conversion of metadata."""
-import json
-import os
 
+from .languages import get_iso6393_code
 from .marc21_record import DataField, Marc21Record, SubField
 
 
 class Converter(object):
     """Converter Class to facilitate conversion of metadata."""
 
-    def __init__(self):
-        """Default Constructor of the class."""
-        # Cache iso639-3 language codes to dict
-        self.languages = self.initialize_languages()
-
-    def initialize_languages(self) -> dict:
-        """Initialize language cache dictionary."""
-        language_cache = dict()
-        path = os.path.join(os.path.dirname(__file__), "iso6393.json")
-        with open(path) as file:
-            languages = json.load(file)
-            for language in languages:
-                language_cache[language["name"]] = dict()
-                for key, value in language.items():
-                    if key == "iso6393":
-                        language_cache[language["name"]] = value
-                        break
-        return language_cache
-
     def convert_pure_json_to_marc21_xml(self, pure_json: dict):
         """Convert record from Pure JSON format to MARC21XML."""
         record = Marc21Record()
@@ -168,9 +148,9 @@ class Converter(object):
         if isinstance(value, dict):
             for locale in value["term"]["text"]:
                 if locale["locale"] == "en_GB":
-                    language = locale["value"]
-                    language_iso6393 = self.languages[language]
-                    record.add_value(tag="041", code="a", value=language_iso6393)
+                    language_iso6393 = get_iso6393_code(locale["value"])
+                    if language_iso6393:
+                        record.add_value(tag="041", code="a", value=language_iso6393)
         else:
             raise RuntimeError("Unhandled value type")
 
@@ -342,3 +322,4 @@ class Converter(object):
             record.add_value(tag="773", ind1="0", ind2="8", code="g", value=value)
         else:
             raise RuntimeError("Unhandled value type")
+
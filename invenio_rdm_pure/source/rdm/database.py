@@ -7,36 +7,148 @@
 
 """File description."""
 
+import re
+from typing import Dict, Iterable, Iterator, List
+
 from flask import current_app
 from flask_security.utils import hash_password
 from invenio_db import db
+from sqlalchemy import bindparam, text
 
+from ...setup import database_fetch_size, database_in_batch_size
 from ..reports import Reports
 
+# Table and column names can not be bound parameters, only these are accepted
+_identifier = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
 
 class RdmDatabase:
-    """Responsible for database connection and querying."""
+    """Responsible for database connection and querying.
+
+    Queries run on the pooled connections of the invenio_db engine, with bound
+    parameters. Statements are built and compiled once, then reused.
+    """
+
+    # Shared by all instances: query string -> statement, and compiled statements
+    _statements = {}
+    _compiled_cache = {}
 
-    def __init__(self):
-        """Description."""
+    def __init__(self, engine=None):
+        """*engine*: SQLAlchemy engine, by default the one of invenio_db."""
         self.report = Reports()
+        self._engine = engine
+
+    @property
+    def engine(self):
+        """Engine whose pool provides the connections."""
+        return self._engine or db.engine
 
     def select_query(self, fields: str, table: str, filters={}):
-        """Makes a select query to the database."""
-        # Creating filters string
-        filters_str = ""
-        if filters:
-            filters_str += " WHERE"
-            for key in filters:
-                filters_str += f" {key} = {filters[key]} AND"
-            filters_str = filters_str[:-4]
-        # Query
-        query = f"SELECT {fields} FROM {table}{filters_str};"
-
-        self.cursor.execute(query)
-        if self.cursor.rowcount == 0:
+        """Makes a select query to the database.
+
+        The *filters* values are bound parameters, they must not be quoted.
+        Returns False if no row matches.
+        """
+        query, parameters = self._select(fields, table, filters)
+        rows = self.execute(query, parameters)
+        if not rows:
             return False
-        return self.cursor.fetchall()
+        return rows
+
+    def select_in(
+        self,
+        fields: str,
+        table: str,
+        column: str,
+        values: Iterable,
+        filters={},
+        batch_size: int = database_in_batch_size,
+    ) -> List[tuple]:
+        """Selects the rows whose *column* is one of *values*.
+
+        The values are sent in batches of *batch_size*, one query per batch.
+        """
+        self._check_identifiers([column])
+        query, parameters = self._select(fields, table, filters)
+        query += f"{' AND' if filters else ' WHERE'} {column} IN :values"
+        values = list(dict.fromkeys(values))
+
+        rows = []
+        for index in range(0, len(values), batch_size):
+            batch = values[index : index + batch_size]
+            rows += self.execute(query, dict(parameters, values=batch), ["values"])
+        return rows
+
+    def iterate_query(
+        self,
+        fields: str,
+        table: str,
+        filters={},
+        fetch_size: int = database_fetch_size,
+    ) -> Iterator[tuple]:
+        """Yields the rows of a select query, fetched *fetch_size* at a time.
+
+        The result is streamed (server side cursor where supported), therefore
+        large tables are not loaded in memory at once.
+        """
+        query, parameters = self._select(fields, table, filters)
+        with self.engine.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, compiled_cache=self._compiled_cache
+            ).execute(self._statement(query), parameters)
+            while True:
+                rows = result.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    def get_user_emails(self, user_ids: Iterable[int]) -> Dict[int, str]:
+        """Emails of the given users, with one query per batch of ids."""
+        rows = self.select_in("id, email", "accounts_user", "id", user_ids)
+        return {user_id: email for user_id, email in rows}
+
+    def execute(self, query: str, parameters: dict = None, expanding=()):
+        """Runs a query with bound parameters, returns all its rows.
+
+        *expanding*: parameters holding a list of values, e.g. for "IN :values".
+        """
+        with self.engine.connect() as connection:
+            result = connection.execution_options(
+                compiled_cache=self._compiled_cache
+            ).execute(self._statement(query, expanding), parameters or {})
+            return result.fetchall()
+
+    def _statement(self, query: str, expanding=()):
+        """Statement of a query string, created once."""
+        statement = self._statements.get(query)
+        if statement is None:
+            statement = text(query)
+            if expanding:
+                statement = statement.bindparams(
+                    *[bindparam(name, expanding=True) for name in expanding]
+                )
+            self._statements[query] = statement
+        return statement
+
+    def _select(self, fields: str, table: str, filters: dict):
+        """Select query string with a bound parameter for each filter."""
+        field_names = [field.strip() for field in fields.split(",")]
+        if field_names != ["*"]:
+            self._check_identifiers(field_names)
+        self._check_identifiers([table, *filters])
+
+        query = f"SELECT {', '.join(field_names)} FROM {table}"
+        if filters:
+            conditions = [f"{key} = :{key}" for key in filters]
+            query += f" WHERE {' AND '.join(conditions)}"
+        return query, dict(filters)
+
+    @staticmethod
+    def _check_identifiers(identifiers: list):
+        """Table and column names are written in the query, not bound."""
+        for identifier in identifiers:
+            if not _identifier.match(identifier):
+                raise ValueError(f"Invalid SQL identifier: {identifier}")
 
     @staticmethod
     def get_pure_user_id():
@@ -10,6 +10,7 @@
 from ...setup import data_files_name
 from ..reports import Reports
 from ..utils import file_read_lines
+from .record_index import record_index
 from .requests_rdm import Requests
 
 
@@ -38,8 +39,8 @@ class Delete:
         # Remove deleted recid from to_delete.txt
         self._remove_recid_from_delete_list(recid)
 
-        # remove record from all_rdm_records.txt
-        self._remove_recid_from_records_list(recid)
+        # remove record from the local record index
+        record_index.remove(recid)
 
         return response
 
@@ -92,9 +93,7 @@ class Delete:
 
     def all_records(self):
         """Delete all RDM records."""
-        file_data = open(data_files_name["all_rdm_records"]).readlines()
-        for line in file_data:
-            recid = line.split(" ")[1].strip("\n")
+        for recid in record_index.all_recids():
             self.record(recid)
 
     def _read_file_recids(self):
@@ -114,12 +113,3 @@ class Delete:
             for line in lines:
                 if line.strip("\n") != recid:
                     f.write(line)
-
-    def _remove_recid_from_records_list(self, recid):
-        """Description."""
-        file_name = "all_rdm_records"
-        lines = file_read_lines(file_name)
-        with open(data_files_name[file_name], "w") as f:
-            for line in lines:
-                if line.strip("\n").split(" ")[1] != recid:
-                    f.write(line)
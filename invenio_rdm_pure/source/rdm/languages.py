@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""ISO 639-3 language codes, indexed by language name."""
+
+import json
+import threading
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from ...setup import iso6393_file_name
+
+# Built once per process, on first use
+_languages = None
+_languages_lock = threading.Lock()
+
+
+def normalize_language_name(name: str) -> str:
+    """Ignores the case and the whitespace of a language name."""
+    return " ".join(name.split()).casefold()
+
+
+def get_languages() -> Mapping[str, str]:
+    """Read-only index of the normalized language names to their ISO 639-3 code."""
+    global _languages
+    if _languages is None:
+        with _languages_lock:
+            if _languages is None:
+                with open(iso6393_file_name) as fp:
+                    entries = json.load(fp)
+                languages = {}
+                for entry in entries:
+                    # The first of duplicate names wins, as with the former scan
+                    name = normalize_language_name(entry["name"])
+                    languages.setdefault(name, entry["iso6393"])
+                _languages = MappingProxyType(languages)
+    return _languages
+
+
+def get_iso6393_code(name: str) -> Optional[str]:
+    """ISO 639-3 code of a language name, None if it is unknown."""
+    if not name:
+        return None
+    return get_languages().get(normalize_language_name(name))
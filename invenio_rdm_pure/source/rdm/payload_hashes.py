@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Hashes of the payloads sent to RDM, to skip the Pure records that did not change."""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from typing import Dict, Optional
+
+from ...setup import data_files_name
+from ..local_store import LocalStore
+
+# Set from the records already in RDM, they change without the Pure record changing
+_volatile_fields = ("metadataVersion", "metadataOtherVersions")
+
+
+def payload_hash(data: dict, files: Dict[str, tuple]) -> str:
+    """SHA-256 of the canonical JSON of a record and of its files.
+
+    *files* maps the file names to their digest and size given by Pure.
+    """
+    payload = {key: value for key, value in data.items() if key not in _volatile_fields}
+    payload["files"] = sorted([name, *file] for name, file in files.items())
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PayloadHashes(LocalStore):
+    """Hash of the last payload successfully sent to RDM, for each Pure uuid."""
+
+    def _create_tables(self, connection: sqlite3.Connection):
+        """Creates the payloads table."""
+        connection.execute(
+            """CREATE TABLE IF NOT EXISTS payloads (
+                uuid TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                updated TEXT NOT NULL
+            )"""
+        )
+
+    def get(self, uuid: str) -> Optional[str]:
+        """Hash of the last payload of the uuid, None if it was never sent."""
+        row = self.connection.execute(
+            "SELECT hash FROM payloads WHERE uuid = ?", (uuid,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, uuid: str, value: str):
+        """Stores the hash of the payload just sent."""
+        with self.connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO payloads VALUES (?, ?, ?)",
+                (uuid, value, datetime.now().isoformat()),
+            )
+
+    def remove(self, uuid: str):
+        """Forgets the uuid, its next payload is sent in any case."""
+        with self.connection as connection:
+            connection.execute("DELETE FROM payloads WHERE uuid = ?", (uuid,))
+
+
+payload_hashes = PayloadHashes(data_files_name["payload_hashes"])
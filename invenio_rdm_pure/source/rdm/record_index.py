@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Local index of the RDM records created from Pure research outputs."""
+
+import os
+import sqlite3
+from datetime import datetime
+
+from ...setup import data_files_name
+from ..local_store import LocalStore
+
+
+class RecordIndex(LocalStore):
+    """Persistent uuid <-> recid index, stored in a SQLite database.
+
+    It replaces data/all_rdm_records.txt (imported on first use) and spares
+    a search request to RDM every time the recid of a uuid is needed.
+    """
+
+    def __init__(self, db_file: str, records_list_file: str = ""):
+        """*records_list_file*: the old all_rdm_records.txt, imported once."""
+        super().__init__(db_file)
+        self.records_list_file = records_list_file
+
+    def _create_tables(self, connection: sqlite3.Connection):
+        """Creates the records table and imports all_rdm_records.txt."""
+        connection.execute(
+            """CREATE TABLE IF NOT EXISTS records (
+                recid TEXT PRIMARY KEY,
+                uuid TEXT NOT NULL,
+                version INTEGER,
+                created TEXT NOT NULL,
+                updated TEXT NOT NULL
+            )"""
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS records_uuid ON records (uuid, created)"
+        )
+        self._import_records_list(connection)
+
+    def _import_records_list(self, connection: sqlite3.Connection):
+        """Imports the uuid recid pairs of the old all_rdm_records.txt."""
+        if not self.records_list_file or not os.path.isfile(self.records_list_file):
+            return
+        if connection.execute("SELECT 1 FROM records LIMIT 1").fetchone():
+            return
+
+        # Lines were appended: the insertion order (rowid) tells the newest record
+        now = datetime.now().isoformat()
+        rows = []
+        with open(self.records_list_file) as fp:
+            for line in fp:
+                line = line.split()
+                if len(line) == 2:
+                    rows.append((line[1], line[0], None, now, now))
+
+        connection.executemany(
+            "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)", rows
+        )
+
+    def add(self, uuid: str, recid: str, version: int = None):
+        """Adds a record, or updates it if the recid is already listed."""
+        now = datetime.now().isoformat()
+        with self.connection as connection:
+            connection.execute(
+                "UPDATE records SET uuid = ?, version = ?, updated = ? WHERE recid = ?",
+                (uuid, version, now, recid),
+            )
+            connection.execute(
+                "INSERT OR IGNORE INTO records VALUES (?, ?, ?, ?, ?)",
+                (recid, uuid, version, now, now),
+            )
+
+    def remove(self, recid: str):
+        """Removes a record from the index."""
+        with self.connection as connection:
+            connection.execute("DELETE FROM records WHERE recid = ?", (recid,))
+
+    def get_recids(self, uuid: str) -> list:
+        """All recids of the records with the given uuid, the newest first."""
+        rows = self.connection.execute(
+            "SELECT recid FROM records WHERE uuid = ? ORDER BY created DESC, rowid DESC",
+            (uuid,),
+        )
+        return [row[0] for row in rows]
+
+    def get_uuid(self, recid: str):
+        """Uuid of the given record, None if it is not indexed."""
+        row = self.connection.execute(
+            "SELECT uuid FROM records WHERE recid = ?", (recid,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def all_recids(self) -> list:
+        """All indexed recids, the oldest first."""
+        rows = self.connection.execute(
+            "SELECT recid FROM records ORDER BY created, rowid"
+        )
+        return [row[0] for row in rows]
+
+
+record_index = RecordIndex(
+    data_files_name["rdm_records_index"], data_files_name["all_rdm_records"]
+)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Concurrent update of many RDM records, e.g. after a group split or merge."""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+from flask import current_app
+from requests import RequestException, Response
+
+from ...setup import (
+    record_update_attempts,
+    record_update_report_interval,
+    record_update_retry_delay,
+    record_update_retry_max_delay,
+    record_update_workers,
+)
+from ..pipeline import Pipeline, Stage
+from ..reports import Reports
+from ..retry import RetryPolicy
+from ..utils import add_spaces
+from .requests_rdm import Requests
+
+
+class RecordUpdater:
+    """Sends the PUT requests of many record updates concurrently.
+
+    All PUT requests go through Requests, hence are paced by the RDM rate
+    limiter shared with the other tasks. Since a PUT replaces the whole
+    metadata, a failed update can be sent again without side effects.
+    """
+
+    def __init__(self, report_files: List[str], workers: int = record_update_workers):
+        """*report_files*: where the progress is reported."""
+        self.report_files = report_files
+        self.workers = workers
+        self.report = Reports()
+        self.retry_policy = RetryPolicy(
+            record_update_attempts,
+            record_update_retry_delay,
+            record_update_retry_max_delay,
+        )
+        self._lock = threading.Lock()
+
+    def run(self, records: List[dict], modify: Callable[[dict], Optional[dict]]):
+        """Updates the records (metadata of RDM search hits) in RDM.
+
+        *modify* returns the new metadata of a record, None if it is unchanged.
+        Returns the counters of the updates.
+        """
+        self.counters = {
+            "total": len(records),
+            "updated": 0,
+            "unchanged": 0,
+            "errors": 0,
+        }
+        self.start = time.time()
+
+        def update(record: dict):
+            self._update_record(record, modify)
+
+        pipeline = Pipeline(
+            [Stage("update", update, self.workers, self.workers * 2)],
+            app=current_app._get_current_object(),
+        )
+        pipeline.run(records)
+
+        # Errors raised by modify
+        self.counters["errors"] += pipeline.stats()[0]["errors"]
+        self._report_progress()
+        return self.counters
+
+    def _update_record(self, record: dict, modify: Callable):
+        """Modifies and sends a record, counts the result."""
+        data = modify(record)
+        if data is None:
+            self._count("unchanged")
+            return
+
+        recid = record["recid"]
+        response = self.retry_policy.call(lambda: self._put(recid, data))
+        if response is not None and response.status_code < 300:
+            self._count("updated")
+        else:
+            self.report.add(f"\tUpdate record @ Error @ {recid}", self.report_files)
+            self._count("errors")
+
+    @staticmethod
+    def _put(recid: str, data: dict) -> Optional[Response]:
+        """Sends the metadata, None if the update should be sent again."""
+        try:
+            response = Requests.put_metadata(recid, data)
+        except RequestException:
+            return None
+        # The server failed, not the request
+        if response.status_code >= 500:
+            return None
+        return response
+
+    def _count(self, counter: str):
+        """Updates the counters, reports the progress at regular intervals."""
+        with self._lock:
+            self.counters[counter] += 1
+            done = (
+                self.counters["updated"]
+                + self.counters["unchanged"]
+                + self.counters["errors"]
+            )
+            if done % record_update_report_interval == 0:
+                self._report_progress()
+
+    def _report_progress(self):
+        """Reports the updated records and the throughput."""
+        elapsed = time.time() - self.start
+        throughput = self.counters["updated"] / elapsed if elapsed else 0
+        arguments = [
+            add_spaces(self.counters["updated"]),
+            add_spaces(self.counters["total"]),
+            add_spaces(self.counters["unchanged"]),
+            add_spaces(self.counters["errors"]),
+            round(throughput, 2),
+        ]
+        self.report.add_template(self.report_files, ["update", "progress"], arguments)
@@ -8,16 +8,42 @@
 """File description."""
 
 import json
+import queue
+import threading
 import time
-from os import makedirs, path, remove
+from os import remove
+from typing import Iterator
 
-import requests
 from flask import current_app
-from requests import Response
-
-from ...setup import push_dist_sec, temporary_files_name, versioning_running, wait_429
+from requests import RequestException, Response
+
+from ...setup import (
+    backoff_429_base,
+    data_files_name,
+    file_transfer_chunk_size,
+    http_pool_connections,
+    rdm_pool_maxsize,
+    rdm_rate_burst,
+    rdm_request_timeout,
+    rdm_requests_per_hour,
+    rdm_search_max_results,
+    rdm_search_page_size,
+    rdm_verify_ssl,
+    recid_poll_attempts,
+    recid_poll_delay,
+    retries_429,
+    temporary_files_name,
+    versioning_running,
+    wait_429,
+)
+from ..debug_capture import debug_capture
+from ..file_cache import DigestCheck, DigestMismatch
+from ..pure.requests_pure import open_pure_file
+from ..rate_limiter import RateLimiter
 from ..reports import Reports
+from ..sessions import PooledSession, StreamedBody
 from ..utils import add_spaces
+from .record_index import record_index
 
 
 class Requests:
@@ -25,6 +51,23 @@ class Requests:
 
     report = Reports()
 
+    # Shared by all instances and threads, keeps the connections to RDM alive
+    session = PooledSession(
+        http_pool_connections,
+        rdm_pool_maxsize,
+        timeout=rdm_request_timeout,
+        verify=rdm_verify_ssl,
+    )
+
+    # Paces the write requests of all threads and processes (5000 / hour)
+    rate_limiter = RateLimiter(
+        data_files_name["rdm_rate_limit"],
+        rdm_requests_per_hour,
+        rdm_rate_burst,
+        backoff_429_base,
+        wait_429,
+    )
+
     @staticmethod
     def _request_headers(parameters: list):
         """Description."""
@@ -61,22 +104,14 @@ class Requests:
             url = url[:-1]
 
         # Sending request
-        response = requests.get(url, headers=headers, params=params, verify=False)
-
-        # Write response to file
-        get_response_file = temporary_files_name["get_rdm_metadata"]
-        if not path.exists(path.dirname(get_response_file)):
-            makedirs(path.dirname(get_response_file))
-        with open(get_response_file, "wb") as fp:
-            fp.write(response.content)
+        response = cls._send("GET", url, headers=headers, params=params)
+        debug_capture.add("rdm_get", url, response)
 
         cls._check_response(response)
         return response
 
     def post_metadata(self, data: str):
         """Used to create a new record."""
-        open(temporary_files_name["post_rdm_metadata"], "w").write(data)
-
         headers = self._request_headers(["content_type"])
         params = self._request_params()
 
@@ -84,15 +119,16 @@ class Requests:
 
         rdm_records_url = current_app.config.get("INVENIO_PURE_RECORDS_URL")
 
-        response = requests.post(
+        response = self._send(
+            "POST",
             rdm_records_url,
+            write=True,
             headers=headers,
             params=params,
             data=data_utf8,
-            verify=False,
         )
 
-        open(temporary_files_name["post_rdm_response"], "wb").write(response.content)
+        debug_capture.add("rdm_post", rdm_records_url, response, data)
 
         self._check_response(response)
         return response
@@ -108,27 +144,31 @@ class Requests:
         rdm_record_url = str(current_app.config.get("INVENIO_PURE_RECORD_URL"))
         url = rdm_record_url.format(recid)
 
-        response = requests.put(
-            url, headers=headers, params=params, data=data, verify=False
+        response = cls._send(
+            "PUT", url, write=True, headers=headers, params=params, data=data
         )
 
         cls._check_response(response)
         return response
 
     def put_file(self, file_path_name: str, recid: str):
-        """Description."""
-        headers = self._request_headers(["file"])
-        data = open(file_path_name, "rb").read()
-
+        """Uploads a file, read from disk while it is sent."""
         # Get only the file name
         file_name = file_path_name.split("/")[-1]
 
+        with open(file_path_name, "rb") as fp:
+            return self.put_file_content(file_name, recid, fp)
+
+    def put_file_content(self, file_name: str, recid: str, data) -> Response:
+        """Uploads the content of a file: a file object, a StreamedBody or bytes."""
+        headers = self._request_headers(["file"])
+
         rdm_record_url = current_app.config.get("INVENIO_PURE_RECORD_URL")
         url = rdm_record_url.format(recid)
 
-        url += "/files/{file_name}"
+        url += f"/files/{file_name}"
 
-        return requests.put(url, headers=headers, data=data, verify=False)
+        return self._send("PUT", url, write=True, headers=headers, data=data)
 
     def delete_metadata(self, recid: str):
         """Description."""
@@ -136,38 +176,164 @@ class Requests:
         rdm_record_url = current_app.config.get("INVENIO_PURE_RECORD_URL")
         url = rdm_record_url.format(recid)
 
-        response = requests.delete(url, headers=headers, verify=False)
+        response = self._send("DELETE", url, write=True, headers=headers)
 
         self._check_response(response)
         return response
 
+    @classmethod
+    def _send(cls, method: str, url: str, write: bool = False, **kwargs) -> Response:
+        """Sends a request to RDM.
+
+        Write requests are paced by the shared rate limiter, reads are not.
+        A 429 response (more then 5000 requests / hour) blocks the limiter and
+        the request is sent again after an increasing wait.
+        """
+        attempt = 0
+        while True:
+            if write:
+                cls.rate_limiter.acquire()
+
+            response = cls.session.request(method, url, **kwargs)
+            cls.rate_limiter.update(response)
+
+            if response.status_code != 429 or attempt >= retries_429:
+                return response
+
+            # A streamed body can not be sent again, a file is read again
+            data = kwargs.get("data")
+            if isinstance(data, StreamedBody):
+                return response
+            if hasattr(data, "seek"):
+                data.seek(0)
+
+            wait = cls.rate_limiter.backoff(response, attempt)
+            cls.report.add(f"\tToo many RDM requests @ {response} @ Wait {wait} sec.")
+            time.sleep(wait)
+            attempt += 1
+
     @classmethod
     def _check_response(cls, response):
         """Description."""
-        http_code = response.status_code
-        if http_code >= 300 and http_code != 429:
+        if response.status_code >= 300:
             cls.report.add(str(response.content))
             return False
-
-        # Checks if too many requests are submitted to RDM (more then 5000 / hour)
-        if response.status_code == 429:
-            report = f"{response.content}\nToo many RDM requests.. wait {wait_429 / 60} minutes\n"
-            cls.report.add(report)
-            time.sleep(wait_429)
-            return False
-
-        # RDM accepts 5000 records per hour (one record every ~ 1.4 sec.)
-        time.sleep(push_dist_sec)
-
         return True
 
-    def get_metadata_by_query(self, query_value: str):
+    def get_metadata_by_query(self, query_value: str, page: int = 1, size: int = 250):
         """Query RDM record metadata."""
-        params = {"sort": "mostrecent", "size": 250, "page": 1, "q": f'"{query_value}"'}
-        response = self.get_metadata(params)
+        params = {
+            "sort": "mostrecent",
+            "size": size,
+            "page": page,
+            "q": f'"{query_value}"',
+        }
+        return self.get_metadata(params)
+
+    def iterate_metadata_by_query(
+        self, query_value: str, size: int = rdm_search_page_size
+    ) -> Iterator[dict]:
+        """Yields the hits of all the records matching a query, the newest first."""
+        params = {"sort": "mostrecent", "q": f'"{query_value}"'}
+        return self.iterate_metadata(params, size)
+
+    def iterate_metadata(
+        self, additional_parameters: dict, size: int = rdm_search_page_size
+    ) -> Iterator[dict]:
+        """Yields the hits of all the records found by a search, page after page.
+
+        The link to the next page given by RDM (links.next) is followed, otherwise
+        the next page number is requested. Every iterator has its own background
+        thread, requesting the next page while the hits of the current one are
+        processed. At most one page waits in its bounded queue, and no page is
+        requested once the caller stops iterating.
+        """
+        app = current_app._get_current_object()
+        pages = queue.Queue(1)
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._prefetch_search_pages,
+            args=(app, additional_parameters, size, pages, stop),
+            daemon=True,
+        )
+        thread.start()
+        try:
+            while True:
+                page = pages.get()
+                if page is None:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield from page
+        finally:
+            stop.set()
+
+    def _prefetch_search_pages(
+        self,
+        app,
+        additional_parameters: dict,
+        size: int,
+        pages: queue.Queue,
+        stop: threading.Event,
+    ):
+        """Puts the hits of every page in *pages*, then None (or the exception)."""
+        params = dict(additional_parameters, size=size, page=1)
+        next_url = None
+        last = None
+        try:
+            while not stop.is_set():
+                page = self._get_search_page(app, params, next_url)
+                if page is None:
+                    break
+                hits, total, next_url = page
+                if not self._put_search_page(pages, stop, hits):
+                    return
+
+                fetched = params["page"] * size
+                if len(hits) < size or fetched >= total:
+                    break
+                if fetched + size > rdm_search_max_results:
+                    self.report.add(
+                        f"\tRDM search @ Only the first {fetched} of {total} hits"
+                        f" can be paged @ {additional_parameters}"
+                    )
+                    break
+                params = dict(params, page=params["page"] + 1)
+        except Exception as error:
+            # Raised to the caller
+            last = error
+        self._put_search_page(pages, stop, last)
 
-        self._check_response(response)
-        return response
+    @staticmethod
+    def _put_search_page(pages: queue.Queue, stop: threading.Event, page) -> bool:
+        """Waits for a free place in the queue, False if the caller stopped."""
+        while not stop.is_set():
+            try:
+                pages.put(page, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get_search_page(self, app, params: dict, url: str = None):
+        """Hits, total and link to the next page, None if the request failed."""
+        with app.app_context():
+            if url:
+                headers = self._request_headers(["content_type"])
+                response = self._send("GET", url, headers=headers)
+                self._check_response(response)
+            else:
+                response = self.get_metadata(params)
+
+        if response.status_code >= 300:
+            return None
+        resp_json = json.loads(response.content)
+        total = resp_json["hits"]["total"]
+        # Elasticsearch 7 gives {"value": .., "relation": ..}
+        if isinstance(total, dict):
+            total = total["value"]
+        next_url = resp_json.get("links", {}).get("next")
+        return resp_json["hits"]["hits"], total, next_url
 
     def get_metadata_by_recid(self, recid: str):
         """Having the record recid gets from RDM its metadata."""
@@ -177,10 +343,7 @@ class Requests:
             return False
 
         # RDM request
-        response = self.get_metadata({}, recid)
-
-        self._check_response(response)
-        return response
+        return self.get_metadata({}, recid)
 
     def get_recid(self, uuid: str, global_counters: object):
         """
@@ -189,67 +352,173 @@ class Requests:
         It if needed to:
         1 - check if there are duplicates
         2 - delete duplicates
-        3 - add the record uuid and recid to all_rdm_records.txt.
-        """
-        response = self.rdm_requests.get_metadata_by_query(uuid)
+        3 - add the record uuid and recid to the local record index.
 
-        resp_json = json.loads(response.content)
+        RDM is searched only if the uuid is not in the local record index.
+        """
+        # Imported here since delete_record depends on this module
+        from .delete_record import Delete
 
-        total_recids = resp_json["hits"]["total"]
-        if total_recids == 0:
-            # If there are no records with the same uuid means it is the first one (version 1)
-            return False
+        recids = record_index.get_recids(uuid)
+        if recids:
+            report = f"\tRDM get recid @ Local index @ Total: {add_spaces(len(recids))} @ {recids[0]}"
+            self.report.add(report)
+        else:
+            recids = self._search_recids(uuid)
+            if not recids:
+                # If there are no records with the same uuid means it is the first one (version 1)
+                return False
+            # Oldest first, so that the newest record is also the newest in the index
+            for recid in reversed(recids):
+                record_index.add(uuid, recid)
 
-        # Iterate over all records with the same uuid
         # The first record is the most recent (they are sorted)
-        count = 0
-        newest_recid = ""
-        for item in resp_json["hits"]["hits"]:
-            count += 1
+        newest_recid = recids[0]
 
-            recid = item["metadata"]["recid"]
+        # If versioning is running then it is not necessary to delete older versions of the record
+        if not versioning_running:
+            for recid in recids[1:]:
+                # Duplicate records are deleted
+                response = Delete().record(recid)
 
-            if count == 1:
-                # URLs to be transmitted to Pure if the record is successfuly added in RDM      # TODO TODO TODO TODO TODO
-                rdm_host_url = current_app.config.get("INVENIO_PURE_HOST_URL")
-                api_url = f"{rdm_host_url}api/records/{recid}"
-                landing_page_url = f"{rdm_host_url}records/{recid}"
-                newest_recid = recid
+                if response:
+                    global_counters["delete"]["success"] += 1
+                else:
+                    global_counters["delete"]["error"] += 1
 
-                report = f"\tRDM get recid @ {response} @ Total: {add_spaces(total_recids)} @ {api_url}"
-                self.reports.add(report)
+        return newest_recid
 
-            else:
-                # If versioning is running then it is not necessary to delete older versions of the record
-                if not versioning_running:
-                    # Duplicate records are deleted
-                    response = self.delete.record(recid)
+    def _search_recids(self, uuid: str) -> list:
+        """Searches RDM for the recids of all records with the given uuid, the newest first."""
+        recids = [
+            item["metadata"]["recid"] for item in self.iterate_metadata_by_query(uuid)
+        ]
 
-                    if response:
-                        global_counters["delete"]["success"] += 1
-                    else:
-                        global_counters["delete"]["error"] += 1
+        if recids:
+            # URLs to be transmitted to Pure if the record is successfuly added in RDM      # TODO TODO TODO TODO TODO
+            rdm_host_url = current_app.config.get("INVENIO_PURE_HOST_URL")
+            api_url = f"{rdm_host_url}api/records/{recids[0]}"
 
-        return newest_recid
+            report = f"\tRDM get recid @ Total: {add_spaces(len(recids))} @ {api_url}"
+            self.report.add(report)
+        return recids
 
-    def rdm_add_file(file_name: str, recid: str):
-        """Description."""
-        rdm_requests = Requests()
-        reports = Reports()
+    @staticmethod
+    def get_recid_from_response(response: Response):
+        """Reads the recid of a newly created record from the POST response.
 
+        It is the id of the returned record or, if the body does not include
+        it, the last segment of the Location header.
+        """
+        try:
+            resp_json = json.loads(response.content)
+        except ValueError:
+            resp_json = {}
+
+        if isinstance(resp_json, dict):
+            if resp_json.get("id"):
+                return resp_json["id"]
+            metadata = resp_json.get("metadata")
+            if isinstance(metadata, dict) and metadata.get("recid"):
+                return metadata["recid"]
+
+        location = response.headers.get("Location")
+        if location:
+            return location.rstrip("/").split("/")[-1]
+        return False
+
+    def wait_for_recid(self, uuid: str):
+        """Searches the recid of a new record until it is indexed.
+
+        Used only when the POST response does not include the recid.
+        The search is repeated with an increasing delay (recid_poll_delay),
+        at most recid_poll_attempts times.
+        """
+        # Records of the same uuid that were already there
+        known_recids = record_index.get_recids(uuid)
+
+        delay = recid_poll_delay
+        for attempt in range(recid_poll_attempts):
+            time.sleep(delay)
+            for recid in self._search_recids(uuid):
+                if recid not in known_recids:
+                    return recid
+            delay *= 2
+        return False
+
+    def rdm_add_file(self, file_name: str, recid: str):
+        """Uploads a downloaded file to a record.
+
+        Returns None if the upload failed but can be tried again.
+        """
         file_path_name = f"{temporary_files_name['base_path']}/{file_name}"
 
         # PUT FILE TO RDM
-        response = rdm_requests.put_file(file_path_name, recid)
+        try:
+            response = self.put_file(file_path_name, recid)
+        except RequestException as error:
+            self.report.add(f"\tRDM put file @ Error: {error} @ {file_name}")
+            return None
+        except FileNotFoundError:
+            self.report.add(f"\tRDM put file @ File not downloaded @ {file_name}")
+            return False
 
         # Report
-        reports.add(f"\tRDM put file @ {response} @ {file_name}")
+        self.report.add(f"\tRDM put file @ {response} @ {file_name}")
 
         if response.status_code >= 300:
-            reports.add(response.content)
-            return False
+            self.report.add(response.content)
+            return self._retry_file(response)
 
         else:
             # if the upload was successful then delete file from /reports/temporary_files
             remove(file_path_name)
             return True
+
+    def rdm_pipe_file(
+        self,
+        file_url: str,
+        file_name: str,
+        recid: str,
+        digest: str = None,
+        digest_algorithm: str = None,
+    ):
+        """Streams a file from Pure to RDM, without writing it to disk.
+
+        The upload is not completed if the file does not match its digest.
+        Returns None if the transfer failed but can be tried again.
+        """
+        try:
+            pure_response = open_pure_file(file_url)
+        except RequestException as error:
+            self.report.add(f"\tPure get file @ Error: {error} @ {file_name}")
+            return None
+
+        with pure_response:
+            if pure_response.status_code >= 300:
+                self.report.add(f"\tPure get file @ {pure_response} @ {file_name}")
+                return self._retry_file(pure_response)
+
+            digest_check = DigestCheck(digest_algorithm, digest)
+            body = StreamedBody(pure_response, file_transfer_chunk_size, digest_check)
+            try:
+                response = self.put_file_content(file_name, recid, body)
+            except (RequestException, DigestMismatch) as error:
+                # Also when the download from Pure breaks off
+                self.report.add(f"\tRDM put file @ Error: {error} @ {file_name}")
+                return None
+
+        # Report
+        self.report.add(f"\tRDM put file @ {response} @ Piped from Pure @ {file_name}")
+
+        if response.status_code >= 300:
+            self.report.add(response.content)
+            return self._retry_file(response)
+        return True
+
+    @staticmethod
+    def _retry_file(response: Response):
+        """None if a failed file transfer can be tried again, otherwise False."""
+        if response.status_code == 429 or response.status_code >= 500:
+            return None
+        return False
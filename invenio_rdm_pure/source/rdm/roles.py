@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""RDM roles, the groups named after Pure organisational units, and their members."""
+
+import threading
+from typing import Dict, Iterable, List
+
+from flask import current_app
+from invenio_db import db
+from sqlalchemy.exc import IntegrityError
+
+from ...setup import roles_batch_size
+
+
+class RoleCache:
+    """Names of the existing roles, read from the database with a single query.
+
+    Missing roles are created through the Flask-Security datastore, in batches
+    committed together, instead of running 'invenio roles create' per role.
+    """
+
+    def __init__(self, batch_size: int):
+        """The role names are read on first use."""
+        self.batch_size = batch_size
+        self._names = None
+        # Roles waiting to be created, name -> description
+        self._pending = {}
+        self._lock = threading.RLock()
+
+    def exists(self, name: str) -> bool:
+        """True if the role exists, or is waiting to be created."""
+        with self._lock:
+            return name in self._get_names() or name in self._pending
+
+    def add(self, name: str, description: str) -> bool:
+        """Adds a role to the next batch, False if it already exists.
+
+        The batch is created once it reaches *batch_size* roles.
+        """
+        with self._lock:
+            if self.exists(name):
+                return False
+            self._pending[name] = description
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+        return True
+
+    def flush(self) -> List[str]:
+        """Creates the roles waiting in the batch, returns their names."""
+        with self._lock:
+            if not self._pending:
+                return []
+            pending, self._pending = self._pending, {}
+
+            try:
+                self._create_roles(pending)
+            except IntegrityError:
+                # Created meanwhile by another process: only adds the others
+                self._names = None
+                names = self._get_names()
+                pending = {
+                    name: description
+                    for name, description in pending.items()
+                    if name not in names
+                }
+                self._create_roles(pending)
+
+            self._get_names().update(pending)
+            return list(pending)
+
+    def clear(self):
+        """Forgets the role names, e.g. after roles were deleted."""
+        with self._lock:
+            self._names = None
+
+    @staticmethod
+    def _create_roles(roles: Dict[str, str]):
+        """Creates the roles in one transaction, rolled back if it fails."""
+        datastore = current_app.extensions["security"].datastore
+        try:
+            for name, description in roles.items():
+                datastore.create_role(name=name, description=description)
+            db.session.commit()
+        except Exception:
+            # Otherwise the session is unusable for the next role and user queries
+            db.session.rollback()
+            raise
+
+    def _get_names(self) -> set:
+        """Names of the existing roles."""
+        if self._names is None:
+            role_model = current_app.extensions["security"].datastore.role_model
+            rows = db.session.query(role_model.name).all()
+            self._names = {row[0] for row in rows}
+        return self._names
+
+
+def _membership_tables():
+    """Role model, user model and user-role association table of the datastore."""
+    datastore = current_app.extensions["security"].datastore
+    userrole = datastore.user_model.roles.property.secondary
+    return datastore.role_model, datastore.user_model, userrole
+
+
+def get_role_members(role_names: Iterable[str]) -> Dict[str, Dict[int, str]]:
+    """Id and email of the members of each role.
+
+    A single query joins roles, user-roles and users, for all the roles.
+    """
+    role_model, user_model, userrole = _membership_tables()
+    role_names = set(role_names)
+    members = {name: {} for name in role_names}
+    rows = (
+        db.session.query(role_model.name, user_model.id, user_model.email)
+        .join(userrole, userrole.c.role_id == role_model.id)
+        .join(user_model, user_model.id == userrole.c.user_id)
+        .filter(role_model.name.in_(role_names))
+    )
+    for name, user_id, email in rows:
+        members[name][user_id] = email
+    return members
+
+
+def update_role_members(
+    add: Dict[str, Iterable[int]] = None, remove: Dict[str, Iterable[int]] = None
+) -> Dict[str, int]:
+    """Adds and removes the users of roles, in one transaction.
+
+    *add* and *remove* map role names to user ids. Only the memberships that
+    actually change are written: users already in (or not in) a role are
+    skipped. Returns the number of added, removed and unchanged memberships.
+    """
+    add = {name: set(users) for name, users in (add or {}).items()}
+    remove = {name: set(users) for name, users in (remove or {}).items()}
+    role_model, _, userrole = _membership_tables()
+
+    names = set(add) | set(remove)
+    role_ids = dict(
+        db.session.query(role_model.name, role_model.id).filter(
+            role_model.name.in_(names)
+        )
+    )
+    missing = names - set(role_ids)
+    if missing:
+        raise ValueError(f"Roles not found: {', '.join(sorted(missing))}")
+    members = get_role_members(names)
+
+    counts = {"added": 0, "removed": 0, "unchanged": 0}
+    try:
+        for name, users in add.items():
+            to_add = users - members[name].keys()
+            counts["unchanged"] += len(users) - len(to_add)
+            if to_add:
+                db.session.execute(
+                    userrole.insert(),
+                    [
+                        {"user_id": user_id, "role_id": role_ids[name]}
+                        for user_id in to_add
+                    ],
+                )
+                counts["added"] += len(to_add)
+
+        for name, users in remove.items():
+            to_remove = users & members[name].keys()
+            counts["unchanged"] += len(users) - len(to_remove)
+            if to_remove:
+                db.session.execute(
+                    userrole.delete().where(
+                        (userrole.c.role_id == role_ids[name])
+                        & userrole.c.user_id.in_(to_remove)
+                    )
+                )
+                counts["removed"] += len(to_remove)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return counts
+
+
+role_cache = RoleCache(roles_batch_size)
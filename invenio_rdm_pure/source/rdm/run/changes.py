@@ -7,11 +7,10 @@
 
 """File description."""
 
-import json
 from datetime import datetime, timedelta
 
 from ....setup import data_files_name
-from ...pure.requests_pure import get_next_page, get_pure_metadata
+from ...pure.paginator import PurePaginator
 from ...reports import Reports
 from ...utils import add_spaces, check_if_file_exists, initialize_counters
 from ..add_record import RdmAddRecord
@@ -70,19 +69,18 @@ class PureChanges:
     @_set_counters_and_title
     def _changes_by_date(self, changes_date: str):
         """Gets from Pure all changes that took place in a certain date."""
-        reference = changes_date
-        page = 1
-
-        while reference:
-            # Get from pure all changes of a certain date
-            response = get_pure_metadata("changes", reference, {})
+        # Get from pure all changes of a certain date, page after page
+        paginator = PurePaginator("changes", changes_date)
 
+        for page, (response, json_response) in enumerate(paginator.pages(), 1):
             if response.status_code >= 300:
                 self.report.add(response.content, self.report_files)
                 return False
 
             # Check if there are records in the response from pure
-            json_response = self._records_to_process(response, page, changes_date)
+            json_response = self._records_to_process(
+                response, json_response, page, changes_date
+            )
 
             # If there are no records to process
             if not json_response:
@@ -99,16 +97,10 @@ class PureChanges:
             # Create / Add / Update
             self._update_records(json_response)
 
-            # Gets the reference code of the next page
-            reference = get_next_page(json_response).split("/")[-1]
-
-            page += 1
-
-    def _records_to_process(self, response: object, page: int, changes_date: str):
+    def _records_to_process(
+        self, response: object, json_response: dict, page: int, changes_date: str
+    ):
         """Check if there are records in the response from pure."""
-        # Load response json
-        json_response = json.loads(response.content)
-
         number_records = json_response["count"]
 
         if number_records == 0:
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Checkpoint of the initial synchronization, to resume it after a failure."""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
+
+from ....setup import data_files_name
+from ...local_store import LocalStore
+
+
+class SynchronizationCheckpoint(LocalStore):
+    """Series of research outputs completely stored in RDM.
+
+    A series is identified by its size and offset, as requested to Pure.
+    It is marked as completed only when all of its research outputs were
+    stored, so that a restarted synchronization redoes the unfinished ones.
+    """
+
+    def _create_tables(self, connection: sqlite3.Connection):
+        """Creates the series table."""
+        connection.execute(
+            """CREATE TABLE IF NOT EXISTS series (
+                offset INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                item_count INTEGER NOT NULL,
+                content_hash TEXT NOT NULL,
+                completed TEXT NOT NULL,
+                PRIMARY KEY (offset, size)
+            )"""
+        )
+
+    def complete(self, size: int, offset: int, item_count: int, content_hash: str):
+        """Marks a series as completed."""
+        with self.connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?)",
+                (offset, size, item_count, content_hash, datetime.now().isoformat()),
+            )
+
+    def get(self, size: int, offset: int) -> Optional[dict]:
+        """Item count, content hash and completion date of a completed series."""
+        row = self.connection.execute(
+            "SELECT item_count, content_hash, completed FROM series "
+            "WHERE offset = ? AND size = ?",
+            (offset, size),
+        ).fetchone()
+        if not row:
+            return None
+        return {"item_count": row[0], "content_hash": row[1], "completed": row[2]}
+
+    def completed_series(self) -> Set[Tuple[int, int]]:
+        """Size and offset of all completed series."""
+        rows = self.connection.execute("SELECT size, offset FROM series")
+        return {(row[0], row[1]) for row in rows}
+
+    def clear(self):
+        """Forgets all completed series, the next synchronization starts over."""
+        with self.connection as connection:
+            connection.execute("DELETE FROM series")
+
+
+def content_hash(research_outputs: List[dict]) -> str:
+    """SHA-256 of the canonical JSON of a series of research outputs."""
+    canonical = json.dumps(research_outputs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+synchronization_checkpoint = SynchronizationCheckpoint(
+    data_files_name["synchronization_checkpoint"]
+)
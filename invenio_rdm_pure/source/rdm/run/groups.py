@@ -8,13 +8,16 @@
 """File description."""
 
 import json
-import os
+
+from sqlalchemy.exc import SQLAlchemyError
 
 from ...pure.requests_pure import get_pure_metadata
 from ...reports import Reports
 from ...utils import add_spaces
 from ..database import RdmDatabase
+from ..record_updater import RecordUpdater
 from ..requests_rdm import Requests
+from ..roles import get_role_members, role_cache, update_role_members
 
 
 class RdmGroups:
@@ -141,7 +144,7 @@ class RdmGroups:
     def _get_rdm_group_id(self, externalId: str):
         """Description."""
         response = self.rdm_db.select_query(
-            "id, description", "accounts_role", {"name": f"'{externalId}'"}
+            "id, description", "accounts_role", {"name": externalId}
         )
 
         if not response:
@@ -157,29 +160,28 @@ class RdmGroups:
     def _rdm_split_modify_record(
         self, old_group_externalId: str, new_groups_externalIds: list
     ):
-        """Description."""
-        # Get from RDM all old group's records
-        response = self.rdm_requests.get_metadata_by_query(old_group_externalId)
-
-        resp_json = json.loads(response.content)
-        total_items = resp_json["hits"]["total"]
+        """Replaces the old group with the new ones in all the old group's records."""
+        # Get from RDM all old group's records, before modifying any of them
+        records = [
+            hit["metadata"]
+            for hit in self.rdm_requests.iterate_metadata_by_query(old_group_externalId)
+        ]
 
-        report = f"\tModify old g. records @ ExtId: {add_spaces(old_group_externalId)} @ Num. of records: {total_items}"
+        report = f"\tModify old g. records @ ExtId: {add_spaces(old_group_externalId)} @ Num. of records: {len(records)}"
         self.report.add(report, self.report_files)
 
-        if total_items == 0:
+        if not records:
             self.report.add("\tNothing to modify @ End", self.report_files)
             return True
 
-        # Iterates over all old group records
-        for item in resp_json["hits"]["hits"]:
-            item = item["metadata"]
-
+        def modify(item: dict):
             # Change group restrictions
-            if old_group_externalId in item["group_restrictions"]:
-                item["group_restrictions"].remove(old_group_externalId)
+            group_restrictions = item.setdefault("group_restrictions", [])
+            if old_group_externalId in group_restrictions:
+                group_restrictions.remove(old_group_externalId)
             for i in new_groups_externalIds:
-                item["group_restrictions"].append(i)
+                if i not in group_restrictions:
+                    group_restrictions.append(i)
 
             # Change managingOrganisationalUnit
             item = self._process_managing_organisational_unit(
@@ -187,12 +189,12 @@ class RdmGroups:
             )
 
             # When updating a record it is not possible to specify _communities field
-            del item["_communities"]
-
-            # Update record
-            recid = item["recid"]
+            item.pop("_communities", None)
+            return item
 
-        return True
+        # Update records
+        counters = RecordUpdater(self.report_files).run(records, modify)
+        return counters["errors"] == 0
 
     def _process_managing_organisational_unit(
         self, item: object, old_group_externalId: str
@@ -216,33 +218,20 @@ class RdmGroups:
     def _rdm_split_users_from_old_to_new_group(
         self, old_group_id: str, old_group_externalId: str, new_groups_externalIds: list
     ):
-        """Description."""
-        # Get all users in old group
-        response = self.rdm_db.select_query(
-            "user_id", "accounts_userrole", {"role_id": old_group_id}
-        )
+        """Moves the users of the old group to the new groups, in one transaction."""
+        # Ids and emails of all the users, with a single query
+        users = get_role_members([old_group_externalId])[old_group_externalId]
 
         report = "Old group @@ Num. of users:  "
-        if not response:
-            self.report.add(f"\t{report} 0", self.report_files)
+        self.report.add(f"\t{report} {len(users)}", self.report_files)
+        if not users:
             return
+        self._report_group_users(users)
 
-        self.report.add(f"\t{report} {len(response)}", self.report_files)
-
-        for i in response:
-            user_id = i[0]
-
-            # Get user email
-            user_email = self.rdm_db.select_query(
-                "email", "accounts_user", {"id": user_id}
-            )[0][0]
-
-            for new_group_externalId in new_groups_externalIds:
-                # Add user to new groups
-                self._group_add_user(user_email, new_group_externalId, user_id)
-
-            # Remove user from old group
-            response = self._group_remove_user(user_email, old_group_externalId)
+        self._update_group_members(
+            {externalId: users for externalId in new_groups_externalIds},
+            {old_group_externalId: users},
+        )
 
     def _rdm_merge_modify_records(
         self,
@@ -250,55 +239,58 @@ class RdmGroups:
         new_group_data: dict,
         new_group_externalId: str,
     ):
-        """Description."""
-        # Get from RDM all records with old groups
+        """Replaces the old groups with the new one in all the old groups' records."""
+        # Get from RDM all records with old groups, before modifying any of them
+        records = {}
         for old_group_externalId in old_groups_externalId:
 
             self._rdm_check_if_group_exists(old_group_externalId)
 
-            # Get record metadata
-            response = self.rdm_requests.get_metadata_by_query(old_group_externalId)
-
-            resp_json = json.loads(response.content)
-            total_items = resp_json["hits"]["total"]
+            total_items = 0
+            for hit in self.rdm_requests.iterate_metadata_by_query(
+                old_group_externalId
+            ):
+                # A record of several old groups is updated once
+                records[hit["metadata"]["recid"]] = hit["metadata"]
+                total_items += 1
 
             report = f"\tModify records @ Group: {add_spaces(old_group_externalId)} @ Num. of records: {total_items}"
             self.report.add(report, self.report_files)
 
-            if total_items == 0:
-                continue
-
-            # Iterates over all old group records
-            for item in resp_json["hits"]["hits"]:
-
-                item = item["metadata"]
+        if not records:
+            return True
 
-                # Organisational units
-                item = self._process_organisational_units(
-                    item, new_group_data, old_groups_externalId
-                )
+        def modify(item: dict):
+            # Organisational units
+            item = self._process_organisational_units(
+                item, new_group_data, old_groups_externalId
+            )
 
-                # Group restrictions
+            # Group restrictions
+            for old_group_externalId in old_groups_externalId:
                 self._process_group_restrictions(
                     item, old_group_externalId, new_group_externalId
                 )
 
-                # Managing Organisational Unit
-                if (
-                    "managingOrganisationalUnit_externalId" in item
-                    and item["managingOrganisationalUnit_externalId"]
-                    == old_group_externalId
-                ):
-                    item["managingOrganisationalUnit_name"] = new_group_data["name"]
-                    item["managingOrganisationalUnit_uuid"] = new_group_data["uuid"]
-                    item["managingOrganisationalUnit_externalId"] = new_group_data[
-                        "externalId"
-                    ]
+            # Managing Organisational Unit
+            if (
+                "managingOrganisationalUnit_externalId" in item
+                and item["managingOrganisationalUnit_externalId"]
+                in old_groups_externalId
+            ):
+                item["managingOrganisationalUnit_name"] = new_group_data["name"]
+                item["managingOrganisationalUnit_uuid"] = new_group_data["uuid"]
+                item["managingOrganisationalUnit_externalId"] = new_group_data[
+                    "externalId"
+                ]
 
-                # When updating a record it is not possible to specify _communities field
-                del item["_communities"]
+            # When updating a record it is not possible to specify _communities field
+            item.pop("_communities", None)
+            return item
 
-                # Update record
+        # Update records
+        counters = RecordUpdater(self.report_files).run(list(records.values()), modify)
+        return counters["errors"] == 0
 
     def _process_organisational_units(
         self, item, new_group_data, old_groups_externalId
@@ -339,52 +331,30 @@ class RdmGroups:
     def _merge_users_from_old_to_new_group(
         self, old_groups_externalId: list, new_group_externalId: str
     ):
-        """Description."""
-        # Iterate over old groups
-        for old_group_externalId in old_groups_externalId:
+        """Moves the users of the old groups to the new group, in one transaction."""
+        # Ids and emails of the users of all old groups, with a single query
+        old_groups_users = get_role_members(old_groups_externalId)
 
-            # Get group id
-            response = self.rdm_db.select_query(
-                "id, description",
-                "accounts_role",
-                {"name": f"'{old_group_externalId}'"},
-            )
-
-            if not response:
+        for old_group_externalId in old_groups_externalId:
+            if not role_cache.exists(old_group_externalId):
                 self.report.add(
-                    "\nWarning @ Old group ({old_groups_externalId}) not in database @ END TASK\n"
+                    f"\nWarning @ Old group ({old_group_externalId}) not in database @ END TASK\n"
                 )
                 return False
 
-            old_group_id = response[0][0]
-            old_group_name = response[0][1]
-
-            # Get all users id that are in this group
-            old_group_users = self.rdm_db.select_query(
-                "user_id", "accounts_userrole", {"role_id": old_group_id}
-            )
-
-            if not old_group_users:
-                old_group_users = []
-
-            report = f"\tOld group @ ExtId:     {add_spaces(old_group_externalId)} @ Num. users:  {add_spaces(len(old_group_users))} @ {old_group_name}"
+            old_group_users = old_groups_users[old_group_externalId]
+            report = f"\tOld group @ ExtId:     {add_spaces(old_group_externalId)} @ Num. users:  {add_spaces(len(old_group_users))}"
             self.report.add(report, self.report_files)
+            self._report_group_users(old_group_users)
 
-            for i in old_group_users:
-                user_id = i[0]
-
-                # Get user email
-                user_email = self.rdm_db.select_query(
-                    "email", "accounts_user", {"id": user_id}
-                )[0][0]
-
-                # - - Add user to new group - -
-                self._group_add_user(user_email, new_group_externalId, user_id)
-
-                # - - Remove user from old group - -
-                response = self._group_remove_user(user_email, old_group_externalId)
+        # Users of all old groups, each added once
+        users = set().union(*old_groups_users.values())
+        moved = self._update_group_members(
+            {new_group_externalId: users}, old_groups_users
+        )
 
-            # Delete old group
+        # Delete old groups
+        return moved
 
     def _get_pure_group_metadata(self, externalId: str):
         """Get organisationalUnit name and uuid."""
@@ -427,35 +397,27 @@ class RdmGroups:
 
     def _rdm_check_if_group_exists(self, group_externalId: str):
         """Checks if the group already exists."""
-        response = self.rdm_db.select_query(
-            "*", "accounts_role", {"name": f"'{group_externalId}'"}
-        )
-
-        if response:
+        if role_cache.exists(group_externalId):
             report = f"\tNew group check @@ ExtId:        {add_spaces(group_externalId)} @ Already exists"
             self.report.add(report)
             return True
         return False
 
     def rdm_create_group(self, externalId: str, group_name: str):
-        """Description."""
+        """Creates the RDM role of an organisational unit, unless it exists."""
         # Checks if the group already exists
         response = self._rdm_check_if_group_exists(externalId)
         if response:
             return True
 
-        group_name = group_name.replace("(", "(")
-        group_name = group_name.replace(")", ")")
-        group_name = group_name.replace(" ", "_")
-
-        # Run command
-        command = f"pipenv run invenio roles create {externalId} -d {group_name}"
-        response = os.system(command)
-
         report = f"\tNew group check @@"
 
-        if response != 0:
-            self.report.add(f"{report} Error: {response}")
+        # Created in-process, through the Flask-Security datastore
+        try:
+            role_cache.add(externalId, group_name)
+            role_cache.flush()
+        except SQLAlchemyError as error:
+            self.report.add(f"{report} Error: {error}")
             return False
 
         self.report.add(f"{report} Group created @ External id: {externalId}")
@@ -464,101 +426,33 @@ class RdmGroups:
     def _rdm_add_user_to_group(
         self, user_id: int, group_externalId: str, group_name: str
     ):
-        """Description."""
-        # Get user's rdm email
-        user_email = self.rdm_db.select_query(
-            "email", "accounts_user", {"id": user_id}
-        )[0][0]
-
-        # Get group id
-        response = self.rdm_db.select_query(
-            "id", "accounts_role", {"name": f"'{group_externalId}'"}
-        )
-
-        if not response:
-            # If the group does not exist then creates it
+        """Adds a user to a group, which is created if it does not exist."""
+        if not role_cache.exists(group_externalId):
             self.rdm_create_group(group_externalId, group_name)
-            # Repeats the query to get the group id
-            response = self.rdm_db.select_query(
-                "id", "accounts_role", {"name": f"'{group_externalId}'"}
-            )
-
-        group_id = response[0][0]
-
-        # Checks if match already exists
-        response = self.rdm_db.select_query(
-            "*", "accounts_userrole", {"user_id": user_id, "role_id": group_id}
-        )
-
-        if response:
-            report = f"\tRDM user in group @ User id: {add_spaces(user_id)} @@ Already belongs to group {group_externalId} (id {group_id})"
-            self.report.add(report)
-            return True
-
-        # Adds user to group
-        command = f"pipenv run invenio roles add {user_email} {group_externalId}"
-        response = os.system(command)
-        if response != 0:
-            self.report.add(f"Warning @ Creating group response: {response}")
 
-    def _group_add_user(self, user_email: str, new_group_externalId: str, user_id: str):
-        """Description."""
-        # Get group id
-        group_id = self.rdm_db.select_query(
-            "id", "accounts_role", {"name": f"'{new_group_externalId}'"}
-        )[0][0]
+        return self._update_group_members({group_externalId: [user_id]}, {})
 
-        # Check if the user is already in the group
-        response = self.rdm_db.select_query(
-            "*", "accounts_userrole", {"user_id": user_id, "role_id": group_id}
-        )
-
-        if response:
-            return True
-
-        command = f"pipenv run invenio roles add {user_email} {new_group_externalId}"
-        response = os.system(command)
-
-        report = f"\tAdd user to group @ ExtId:     {add_spaces(new_group_externalId)} @ User id:     {add_spaces(user_id)}"
-        if response != 0:
-            self.report.add(f"{report} @ Error: {response}", self.report_files)
-            return False
-
-        self.report.add(f"{report} @ Success", self.report_files)
-        return True
-
-    def _group_remove_user(self, user_email: str, group_name: str):
-        """Description."""
-        # Get user id
-        user_id = self.rdm_db.select_query(
-            "id", "accounts_user", {"email": f"'{user_email}'"}
-        )[0][0]
-
-        # Get group id
-        group_id = self.rdm_db.select_query(
-            "id", "accounts_role", {"name": f"'{group_name}'"}
-        )[0][0]
-
-        # Check if the user is already in the group
-        response = self.rdm_db.select_query(
-            "*", "accounts_userrole", {"user_id": user_id, "role_id": group_id}
-        )
-
-        report = f"Remove user fromGroup @ ExtId:     {add_spaces(group_name)} @ User id:     {add_spaces(user_id)}"
-
-        if not response:
-            self.report.add(
-                f"\t{report} @ Not in group (already removed)", self.report_files
-            )
-            return True
+    def _report_group_users(self, users: dict):
+        """Lists the users (id -> email) being moved to another group."""
+        for user_id, email in sorted(users.items()):
+            report = f"\tGroup user @@ User id:     {add_spaces(user_id)} @ {email}"
+            self.report.add(report, self.report_files)
 
-        # Remove user from old group
-        command = f"pipenv run invenio roles remove {user_email} {group_name}"
-        response = os.system(command)
+    def _update_group_members(self, add: dict, remove: dict):
+        """Adds and removes group members, reports how many memberships changed.
 
-        if response != 0:
-            self.report.add(f"\t{report} @ Error: {response}", self.report_files)
+        *add* and *remove* map group externalIds to user ids.
+        """
+        try:
+            counts = update_role_members(add, remove)
+        except (SQLAlchemyError, ValueError) as error:
+            self.report.add(f"\tGroup members @@ Error: {error}", self.report_files)
             return False
 
-        self.report.add(f"\t{report} @ Success", self.report_files)
+        arguments = [
+            add_spaces(counts["added"]),
+            add_spaces(counts["removed"]),
+            add_spaces(counts["unchanged"]),
+        ]
+        self.report.add_template(self.report_files, ["groups", "members"], arguments)
         return True
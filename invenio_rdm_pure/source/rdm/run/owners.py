@@ -9,13 +9,14 @@
 
 import json
 
-from ....setup import data_files_name, pure_uuid_length
-from ...pure.requests_pure import get_next_page, get_pure_metadata
+from ....setup import pure_uuid_length
+from ...pure.paginator import PurePaginator
 from ...reports import Reports
-from ...utils import file_read_lines, initialize_counters, shorten_file_name
+from ...utils import initialize_counters, shorten_file_name
 from ..add_record import RdmAddRecord
 from ..database import RdmDatabase
 from ..requests_rdm import Requests
+from ..user_ids_match import user_ids_match
 
 
 class RdmOwners:
@@ -67,29 +68,23 @@ class RdmOwners:
         if identifier == "externalId":
             self._add_user_ids_match(identifier_value)
 
-        next_page = True
-        page = 1
         self.local_counters = {"create": 0, "in_record": 0, "to_update": 0}
 
-        while next_page:
+        params = {"sort": "modified", "page": 1, "pageSize": 100}
+        paginator = PurePaginator(
+            "persons", f"{self.user_uuid}/research-outputs", params
+        )
 
-            # Pure request
-            params = {"sort": "modified", "page": page, "pageSize": 100}
-            response = get_pure_metadata(
-                "persons", f"{self.user_uuid}/research-outputs", params
-            )
+        for page, (response, pure_json) in enumerate(paginator.pages(), 1):
             if response.status_code >= 300:
                 return False
 
-            # Initial response proceses and json load
-            pure_json = self._process_response(response, page)
+            # Initial response proceses
+            pure_json = self._process_response(response, pure_json, page)
             # In case the user has no records
             if not pure_json:
                 return True
 
-            # Checks if there is a 'next' page to be processed
-            next_page = get_next_page(pure_json)
-
             # Iterates over all items in the page
             for item in pure_json["items"]:
 
@@ -109,8 +104,6 @@ class RdmOwners:
                 # Gets record metadata from RDM and checks if the user is already a record owner
                 self._process_record_owners(recid)
 
-            page += 1
-
         self._final_report()
 
     def _process_record_owners(self, recid):
@@ -165,11 +158,8 @@ class RdmOwners:
         self.report.add(report, self.report_files)
         self.report.summary_global_counters(self.report_files, self.global_counters)
 
-    def _process_response(self, response: object, page: int):
+    def _process_response(self, response: object, resp_json: dict, page: int):
         """Checks if there are records to process."""
-        # Load response json
-        resp_json = json.loads(response.content)
-
         total_items = resp_json["count"]
 
         if page == 1:
@@ -185,47 +175,27 @@ class RdmOwners:
     def _get_user_uuid_from_pure(self, key_name: str, key_value: str):
         """Given the user's external id it return the relative user uuid."""
         # If the uuid is not found in the first x items then it will continue with the next page
-        page = 1
-        page_size = 10
-        next_page = True
-
-        while next_page:
-
-            params = {"page": page, "pageSize": page_size, "q": f'"{key_value}"'}
-            response = get_pure_metadata("persons", "", params)
-
-            if response.status_code >= 300:
-                self.report.add(response.content, self.report_files)
-                return False
-
-            record_json = json.loads(response.content)
+        params = {"page": 1, "pageSize": 10, "q": f'"{key_value}"'}
 
-            total_items = record_json["count"]
+        for item in PurePaginator("persons", "", params).items():
 
-            for item in record_json["items"]:
+            if item[key_name] == key_value:
+                first_name = item["name"]["firstName"]
+                lastName = item["name"]["lastName"]
+                uuid = item["uuid"]
 
-                if item[key_name] == key_value:
-                    first_name = item["name"]["firstName"]
-                    lastName = item["name"]["lastName"]
-                    uuid = item["uuid"]
+                self.report.add(
+                    f"Name:    {first_name} {lastName}\nUuid:    {uuid}",
+                    self.report_files,
+                )
 
+                if len(uuid) != pure_uuid_length:
                     self.report.add(
-                        f"Name:    {first_name} {lastName}\nUuid:    {uuid}",
+                        "\n- Warning! Incorrect user_uuid length -\n",
                         self.report_files,
                     )
-
-                    if len(uuid) != pure_uuid_length:
-                        self.report.add(
-                            "\n- Warning! Incorrect user_uuid length -\n",
-                            self.report_files,
-                        )
-                        return False
-                    return uuid
-
-            # Checks if there is a 'next' page to be processed
-            next_page = get_next_page(record_json)
-
-            page += 1
+                    return False
+                return uuid
 
         self.report.add(f"Uuid NOT FOUND - End task\n", self.report_files)
         return False
@@ -261,32 +231,16 @@ class RdmOwners:
 
         rdm_user_id, user_uuid and user_external_id.
         """
-        file_name = data_files_name["user_ids_match"]
-
-        needs_to_add = self._check_user_ids_match("user_ids_match", external_id)
+        needs_to_add = self._check_user_ids_match(external_id)
 
         if needs_to_add:
-            open(file_name, "a").write(
-                f"{self.user_id} {self.user_uuid} {external_id}\n"
-            )
+            user_ids_match.add(self.user_id, self.user_uuid, external_id)
             report = f"user_ids_match @ Adding id toList @ {self.user_id}, {self.user_uuid}, {external_id}"
             self.report.add(report, self.report_files)
 
-    def _check_user_ids_match(self, file_name: str, external_id: str):
-        """Description."""
-        lines = file_read_lines(file_name)
-        for line in lines:
-            line = line.split("\n")[0]
-            line = line.split(" ")
-
-            # Checks if at least one of the ids match
-            if (
-                str(self.user_id) == line[0]
-                or self.user_uuid == line[1]
-                or external_id == line[2]
-            ):
-
-                if line == [str(self.user_id), self.user_uuid, external_id]:
-                    self.report.add("Ids list:   user in list", self.report_files)
-                    return False
+    def _check_user_ids_match(self, external_id: str):
+        """True if the user ids are not yet in user_ids_match.txt."""
+        if user_ids_match.contains(self.user_id, self.user_uuid, external_id):
+            self.report.add("Ids list:   user in list", self.report_files)
+            return False
         return True
@@ -7,12 +7,14 @@
 
 """File description."""
 
-import json
-
-from ...pure.requests_pure import get_pure_metadata
+from ...file_cache import file_cache
+from ...file_transfers import file_transfers
+from ...pure.paginator import PurePaginator
+from ...pure.requests_pure import pure_client
 from ...reports import Reports
 from ...utils import initialize_counters
-from ..add_record import RdmAddRecord
+from ..add_record import RdmAddRecord, orcid_cache
+from ..requests_rdm import Requests
 
 
 class RunPages:
@@ -25,7 +27,14 @@ class RunPages:
 
     def get_pure_by_page(self, page_begin: int, page_end: int, page_size: int):
         """Gets records from Pure 'research-outputs' endpoint by page and submit them to RDM."""
-        for page in range(page_begin, page_end):
+        # The next pages are requested while the current one is submitted to RDM
+        paginator = PurePaginator(
+            "research-outputs",
+            parameters={"page": page_begin, "pageSize": page_size},
+            max_pages=page_end - page_begin,
+        )
+
+        for page, (response, resp_json) in enumerate(paginator.pages(), page_begin):
 
             self.global_counters = initialize_counters()
 
@@ -35,13 +44,9 @@ class RunPages:
                 ["console"], ["pages", "page_and_size"], [page, page_size]
             )
 
-            # Pure get request
-            response = get_pure_metadata(
-                "research-outputs", "", {"page": page, "pageSize": page_size}
-            )
-
-            # Load json response
-            resp_json = json.loads(response.content)
+            if resp_json is None:
+                self.report.add(f"Pure get research outputs @ {response}")
+                return
 
             # Creates data to push to RDM
             for item in resp_json["items"]:
@@ -56,3 +61,14 @@ class RunPages:
         self.report.summary_global_counters(["console"], self.global_counters)
         # Summary pages.log
         self.report.pages_single_line(self.global_counters, pag, page_size)
+        # Pure connections reuse
+        self.report.summary_connections(
+            ["console"], "Pure", pure_client.connection_stats()
+        )
+        self.report.summary_connections(
+            ["console"], "RDM ", Requests.session.connection_stats()
+        )
+        orcid_cache.save()
+        self.report.summary_cache(["console"], "Orcid", orcid_cache.stats())
+        self.report.summary_file_cache(["console"], file_cache.stats())
+        self.report.summary_file_transfers(["console"], file_transfers.stats())
@@ -9,20 +9,40 @@
 
 import datetime
 import os
-import time
-import traceback
-from concurrent.futures import ThreadPoolExecutor
+import threading
 from typing import List
 
 from flask import current_app
+from requests import RequestException
 
+from ....setup import (
+    data_files_name,
+    pure_retry_attempts,
+    pure_retry_base_delay,
+    pure_retry_budget_ratio,
+    pure_retry_max_delay,
+    synchronizer_queue_size,
+    synchronizer_workers,
+)
+from ...file_cache import file_cache
+from ...file_transfers import file_transfers
+from ...pipeline import Pipeline, Stage
 from ...pure.requests_pure import (
     get_pure_metadata,
     get_research_output_count,
     get_research_outputs,
+    pure_client,
+)
+from ...reports import Reports
+from ...retry import RetryBudget, RetryPolicy
+from ...utils import (
+    file_read_lines,
+    get_dates_in_span,
+    initialize_counters,
+    merge_counters,
 )
-from ...utils import get_dates_in_span
-from ..converter import Converter
+from ..add_record import RdmAddRecord, orcid_cache
+from .checkpoint import content_hash, synchronization_checkpoint
 
 
 class Synchronizer(object):
@@ -30,6 +50,15 @@ class Synchronizer(object):
 
     def __init__(self):
         """Default Constructor of the class Synchronizer."""
+        self.report = Reports()
+        # Connection errors and timeouts are retried as failed responses are
+        self.retry_policy = RetryPolicy(
+            pure_retry_attempts,
+            pure_retry_base_delay,
+            pure_retry_max_delay,
+            retry_on=(RequestException,),
+        )
+        self._failed_series_lock = threading.Lock()
 
     def run_initial_synchronization(self) -> None:
         """Run the initial synchronization.
@@ -43,32 +72,40 @@ class Synchronizer(object):
         self.run_initial_research_output_synchronization(pure_api_key, pure_api_url)
 
     def run_initial_research_output_synchronization(
-        self, pure_api_key: str, pure_api_url: str, granularity: int = 100
+        self,
+        pure_api_key: str,
+        pure_api_url: str,
+        granularity: int = 100,
+        resume: bool = True,
     ) -> None:
         """Run initial synchronization for all research outputs.
 
         There are ca. 65300 research output entries in Pure (15.12.2020).
+        The research outputs are requested in series of *granularity* items.
+        The completed series are checkpointed: if *resume* is True, the series
+        completed by a previous run are requested again, but only stored if their
+        research outputs changed meanwhile (e.g. moved to other offsets).
+        Otherwise it starts over.
         """
         research_count = get_research_output_count(pure_api_key, pure_api_url)
         assert research_count != -1, "Failed to get research output count"
-        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
-            for job_counter in range(0, (research_count // granularity) + 1):
-                if job_counter == (research_count // granularity):
-                    executor.submit(
-                        self.synchronize_research_outputs,
-                        pure_api_key,
-                        pure_api_url,
-                        research_count - job_counter * granularity,
-                        job_counter * granularity,
-                    )
-                else:
-                    executor.submit(
-                        self.synchronize_research_outputs,
-                        pure_api_key,
-                        pure_api_url,
-                        granularity,
-                        job_counter * granularity,
-                    )
+
+        if not resume:
+            synchronization_checkpoint.clear()
+        completed = synchronization_checkpoint.completed_series()
+
+        # Series of research outputs, identified by size and offset
+        series = [
+            (min(granularity, research_count - offset), offset)
+            for offset in range(0, research_count, granularity)
+        ]
+        completed = completed.intersection(series)
+        if completed:
+            self.report.add(
+                f"\nResuming synchronization: {len(completed)} of {len(series)} "
+                "series already completed, skipped if they did not change\n"
+            )
+        self._run_pipeline(pure_api_key, pure_api_url, series, checkpoint=True)
 
     def synchronize_research_outputs(
         self, pure_api_key: str, pure_api_url: str, size: int, offset: int
@@ -79,27 +116,214 @@ class Synchronizer(object):
         The *size* parameter defines the length of the series.
         The *offset* parameter defines the offset of the series.
         """
-        while True:
-            research_outputs = get_research_outputs(
-                pure_api_key,
-                pure_api_url,
-                size,
-                offset,
-            )  # Fetch research outputs from Pure
-            if research_outputs:
-                break
-            else:
-                time.sleep(0.001)
-        # Check if list is not empty
-        converter = Converter()
-        for research_output in research_outputs:
-            try:
-                converter.convert_pure_json_to_marc21_xml(research_output)
-            except RuntimeError:
-                traceback.print_exc()
-
-        # TODO: Store record with the help of marc21 module
-        pass
+        self._run_pipeline(pure_api_key, pure_api_url, [(size, offset)])
+
+    def _run_pipeline(
+        self,
+        pure_api_key: str,
+        pure_api_url: str,
+        series: list,
+        checkpoint=False,
+        record_failed=True,
+    ):
+        """Fetches and stores the research outputs of the given series.
+
+        The two stages run concurrently, connected by bounded queues.
+        If *checkpoint* is True, the completely stored series are checkpointed,
+        and the checkpointed ones with the same content are not stored again.
+        If *record_failed* is True, the series that could not be fetched are
+        added to data/failed_research_outputs.txt, otherwise only listed in
+        self.failed_series.
+        """
+        self.global_counters = []
+        self._local = threading.local()
+        self.retry_budget = RetryBudget(pure_retry_budget_ratio)
+        self.failed_series = []
+        self.record_failed = record_failed
+        self.checkpoint = checkpoint
+        self.unchanged_series = 0
+        # Progress of the series being synchronized, by (size, offset)
+        self.series_progress = {}
+        self._series_progress_lock = threading.Lock()
+
+        def fetch(series_size_offset):
+            size, offset = series_size_offset
+            return self._fetch_research_outputs(
+                pure_api_key, pure_api_url, size, offset
+            )
+
+        pipeline = Pipeline(
+            [
+                Stage(
+                    "fetch",
+                    fetch,
+                    synchronizer_workers["fetch"],
+                    synchronizer_queue_size["fetch"],
+                ),
+                Stage(
+                    "store",
+                    self._store_research_output,
+                    synchronizer_workers["store"],
+                    synchronizer_queue_size["store"],
+                ),
+            ],
+            app=current_app._get_current_object(),
+            on_error=self._pipeline_error,
+        )
+        pipeline.run(series)
+
+        # Reports
+        self.report.summary_pipeline(["console"], pipeline.stats())
+        if self.unchanged_series:
+            self.report.add(
+                f"\nCompleted series skipped, unchanged: {self.unchanged_series}"
+            )
+        if self.failed_series:
+            self.report.add(
+                f"\nFailed series: {len(self.failed_series)} - "
+                f"see {data_files_name['failed_research_outputs']}"
+            )
+        self.report.summary_global_counters(
+            ["console"], merge_counters(self.global_counters)
+        )
+        # Confirms that the requests to Pure reused the kept-alive connections
+        self.report.summary_connections(
+            ["console"], "Pure", pure_client.connection_stats()
+        )
+        # Person orcids requested to Pure only once
+        orcid_cache.save()
+        self.report.summary_cache(["console"], "Orcid", orcid_cache.stats())
+        # Files not downloaded again
+        self.report.summary_file_cache(["console"], file_cache.stats())
+        self.report.summary_file_transfers(["console"], file_transfers.stats())
+
+    def _fetch_research_outputs(
+        self, pure_api_key: str, pure_api_url: str, size: int, offset: int
+    ) -> List[dict]:
+        """Fetch stage: gets a series of research outputs from Pure.
+
+        Failed requests are retried with backoff, within the retry budget.
+        If the series can not be fetched, it is recorded to be replayed later.
+        A checkpointed series whose research outputs did not change is skipped.
+        """
+        research_outputs = self.retry_policy.call(
+            lambda: get_research_outputs(pure_api_key, pure_api_url, size, offset),
+            self.retry_budget,
+        )
+        if research_outputs is None:
+            self._add_failed_series(size, offset)
+            return []
+
+        series = (size, offset)
+        series_hash = content_hash(research_outputs)
+        if self.checkpoint:
+            completed = synchronization_checkpoint.get(size, offset)
+            if completed and completed["content_hash"] == series_hash:
+                with self._series_progress_lock:
+                    self.unchanged_series += 1
+                return []
+
+        with self._series_progress_lock:
+            self.series_progress[series] = {
+                "item_count": len(research_outputs),
+                "content_hash": series_hash,
+                "stored": 0,
+            }
+        if not research_outputs:
+            self._add_stored_item(series)
+
+        # Every research output carries its series, to checkpoint it once stored
+        return [
+            {"series": series, "research_output": research_output}
+            for research_output in research_outputs
+        ]
+
+    def replay_failed_research_outputs(self) -> None:
+        """Synchronize again the series that could not be fetched from Pure."""
+        pure_api_key = str(current_app.config.get("PURE_API_KEY"))
+        pure_api_url = str(current_app.config.get("PURE_API_URL"))
+
+        series = self._read_failed_series()
+        if not series:
+            self.report.add("\nNo failed research outputs to replay.\n")
+            return
+
+        self._run_pipeline(
+            pure_api_key, pure_api_url, series, checkpoint=True, record_failed=False
+        )
+
+        # Only the series failing again are kept, the file is left as it was
+        # if the replay did not run to the end
+        with open(data_files_name["failed_research_outputs"], "w") as fp:
+            for size, offset in self.failed_series:
+                fp.write(f"{size} {offset}\n")
+
+    def _read_failed_series(self) -> List[tuple]:
+        """Series listed in data/failed_research_outputs.txt, without duplicates."""
+        series = {}
+        for line in file_read_lines("failed_research_outputs"):
+            line = line.split()
+            if len(line) == 2:
+                series[(int(line[0]), int(line[1]))] = None
+        return list(series)
+
+    def _add_failed_series(self, size: int, offset: int):
+        """Lists a failed series, and adds it to data/failed_research_outputs.txt."""
+        with self._failed_series_lock:
+            self.failed_series.append((size, offset))
+            # A series failing again in a later run is listed only once
+            if self.record_failed and (size, offset) not in self._read_failed_series():
+                with open(data_files_name["failed_research_outputs"], "a") as fp:
+                    fp.write(f"{size} {offset}\n")
+        self.report.add(
+            f"\tPure get research outputs @ Failed @ Size: {size} @ Offset: {offset}"
+        )
+
+    def _pipeline_error(self, stage: str, item, error: Exception):
+        """Reports an item on which a stage of the pipeline failed."""
+        if stage == "fetch":
+            size, offset = item
+            uuid = ""
+        else:
+            size, offset = item["series"]
+            uuid = f" @ Uuid: {item['research_output'].get('uuid')}"
+        self.report.add(
+            f"\tPipeline {stage} @ Failed{uuid} @ Size: {size} @ Offset: {offset}"
+            f" @ {type(error).__name__}: {error}"
+        )
+
+    def _store_research_output(self, record: dict) -> None:
+        """Store stage: pushes the record to RDM."""
+        add_record = getattr(self._local, "add_record", None)
+        if add_record is None:
+            # RdmAddRecord keeps the state of the record it is processing,
+            # therefore every worker uses its own instance and counters
+            add_record = self._local.add_record = RdmAddRecord()
+            self._local.counters = initialize_counters()
+            self.global_counters.append(self._local.counters)
+
+        successful = add_record.create_invenio_data(
+            self._local.counters, record["research_output"]
+        )
+        # A series with a failed record is not checkpointed, hence redone
+        if successful:
+            self._add_stored_item(record["series"])
+
+    def _add_stored_item(self, series: tuple):
+        """Counts a stored record, checkpoints its series when all are stored."""
+        with self._series_progress_lock:
+            progress = self.series_progress[series]
+            if progress["item_count"]:
+                progress["stored"] += 1
+            if progress["stored"] < progress["item_count"]:
+                return
+            del self.series_progress[series]
+
+        if self.checkpoint:
+            size, offset = series
+            synchronization_checkpoint.complete(
+                size, offset, progress["item_count"], progress["content_hash"]
+            )
 
     def run_scheduled_synchronization(self) -> None:
         """Run scheduled synchronization.
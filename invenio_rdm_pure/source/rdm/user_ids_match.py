@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Index of data/user_ids_match.txt, matching RDM users and Pure persons."""
+
+import os
+import threading
+from typing import Optional, Tuple
+
+from ...setup import data_files_name
+from ..utils import check_if_directory_exists
+
+
+class UserIdsMatch:
+    """In-memory index of the lines 'rdm_user_id user_uuid external_id'.
+
+    The file is read again only when its modification time or size changed,
+    e.g. when another process added a user.
+    """
+
+    def __init__(self, file_name: str):
+        """The file is read on first use."""
+        self.file_name = file_name
+        self._signature = None
+        self._lines = set()
+        self._by_user_id = {}
+        self._by_user_uuid = {}
+        self._by_external_id = {}
+        self._lock = threading.Lock()
+
+    def get_user_id(self, external_id: str) -> Optional[str]:
+        """RDM user id of a Pure person externalId, None if not listed."""
+        with self._lock:
+            self._refresh()
+            line = self._by_external_id.get(external_id)
+        return line[0] if line else None
+
+    def get_by_user_id(self, user_id) -> Optional[Tuple[str, str, str]]:
+        """Line of an RDM user id."""
+        with self._lock:
+            self._refresh()
+            return self._by_user_id.get(str(user_id))
+
+    def get_by_user_uuid(self, user_uuid: str) -> Optional[Tuple[str, str, str]]:
+        """Line of a Pure person uuid."""
+        with self._lock:
+            self._refresh()
+            return self._by_user_uuid.get(user_uuid)
+
+    def contains(self, user_id, user_uuid: str, external_id: str) -> bool:
+        """True if the file has a line with exactly these ids."""
+        with self._lock:
+            self._refresh()
+            return (str(user_id), user_uuid, external_id) in self._lines
+
+    def add(self, user_id, user_uuid: str, external_id: str):
+        """Appends a line to the file."""
+        with self._lock:
+            check_if_directory_exists(os.path.dirname(self.file_name))
+            with open(self.file_name, "a") as fp:
+                fp.write(f"{user_id} {user_uuid} {external_id}\n")
+            self._refresh()
+
+    def _refresh(self):
+        """Reads the file if it changed since it was last read."""
+        try:
+            stat = os.stat(self.file_name)
+        except FileNotFoundError:
+            stat = None
+        # Appending a line always changes the size, even within the same mtime
+        signature = (stat.st_mtime_ns, stat.st_size) if stat else None
+        if signature == self._signature:
+            return
+
+        lines = set()
+        by_user_id, by_user_uuid, by_external_id = {}, {}, {}
+        if stat:
+            with open(self.file_name) as fp:
+                for line in fp:
+                    line = tuple(line.split())
+                    if len(line) != 3:
+                        continue
+                    lines.add(line)
+                    # As when scanning the file, the first matching line wins
+                    by_user_id.setdefault(line[0], line)
+                    by_user_uuid.setdefault(line[1], line)
+                    by_external_id.setdefault(line[2], line)
+
+        self._lines = lines
+        self._by_user_id = by_user_id
+        self._by_user_uuid = by_user_uuid
+        self._by_external_id = by_external_id
+        self._signature = signature
+
+
+user_ids_match = UserIdsMatch(data_files_name["user_ids_match"])
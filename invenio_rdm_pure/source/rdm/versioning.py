@@ -7,8 +7,6 @@
 
 """File description."""
 
-import json
-
 from ..reports import Reports
 from ..utils import add_spaces
 from .requests_rdm import Requests
@@ -24,26 +22,15 @@ class Versioning:
 
     def get_uuid_version(self, uuid):
         """Gives the version to use for a new record and old versions of the same uuid."""
-        # Request
-        response = self.rdm_requests.get_metadata_by_query(uuid)
-
-        resp_json = json.loads(response.content)
-
-        message = f"\tRDM metadata version  - {response} - "
+        message = "\tRDM metadata version  - "
 
-        total_recids = resp_json["hits"]["total"]
         all_metadata_versions = []
-
-        if total_recids == 0:
-            # If there are no records with the same uuid means it is the first one (version 1)
-            new_version = 1
-            self.report.add(f"{message}Record NOT found    - Metadata version: 1")
-            return [new_version, all_metadata_versions]
-
         new_version = None
+        found = False
 
-        # Iterates over all records in response
-        for item in resp_json["hits"]["hits"]:
+        # Iterates over all records with the uuid, the newest first
+        for item in self.rdm_requests.iterate_metadata_by_query(uuid):
+            found = True
             rdm_metadata = item["metadata"]
 
             # If a record has a differnt uuid than it will be ignored
@@ -61,6 +48,11 @@ class Versioning:
             version = str(rdm_metadata["metadataVersion"])
             all_metadata_versions.append([recid, version, creation_date])
 
+        if not found:
+            # If there are no records with the same uuid means it is the first one (version 1)
+            self.report.add(f"{message}Record NOT found    - Metadata version: 1")
+            return [1, all_metadata_versions]
+
         # In case the record has no metadataVersion
         if not new_version:
             message += f"Vers. not specified - New metadata version: 1"
@@ -77,18 +69,15 @@ class Versioning:
 
     def update_all_uuid_versions(self, uuid):
         """Description."""
-        # Request
-        response = self.rdm_requests.get_metadata_by_query(uuid)
-
-        resp_json = json.loads(response.content)
-        total_recids = resp_json["hits"]["total"]
+        # All the versions are needed before updating any of them
+        hits = list(self.rdm_requests.iterate_metadata_by_query(uuid))
 
-        if total_recids == 0:
+        if not hits:
             self.report.add("There are no records with this uuid")
             return
 
         all_metadata_versions = []
-        for item in resp_json["hits"]["hits"]:
+        for item in hits:
             # Add data to listed versions
             recid = item["id"]
             creation_date = item["created"].split("T")[0]
@@ -97,7 +86,7 @@ class Versioning:
 
         self.report.add(f"\tUpdate uuid versions")
 
-        for item in resp_json["hits"]["hits"]:
+        for item in hits:
 
             recid = item["id"]
             item = item["metadata"]
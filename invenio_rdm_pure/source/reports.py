@@ -37,6 +37,7 @@ report_templates = {
         "summary": """
 Successful      -> metadata: {} - files: {} - delete: {}
 Errors          -> metadata: {} - files: {} - delete: {}
+Unchanged       -> {}
 """,
     },
     # PAGES       ***
@@ -57,6 +58,38 @@ Update:     {} - Create:     {} - Delete:    {}
 Incomplete: {} - Duplicated: {} - Irrelevant:{}
 """
     },
+    # PIPELINE      ***
+    "pipeline": {
+        # Arguments -> stage, workers, items processed, items produced, errors, items/sec
+        "stage": "Stage {} @ Workers: {} @ In: {} - Out: {} @ Errors: {} @ {} items/sec",
+    },
+    # HTTP          ***
+    "http": {
+        # Arguments -> api name, requests, opened connections, reused connections
+        "connections": "{} connections -> requests: {} - opened: {} - reused: {}",
+    },
+    # GROUPS        ***
+    "groups": {
+        # Arguments -> memberships added, removed, unchanged
+        "members": "\tGroup members @@ Added: {} - Removed: {} - Unchanged: {}",
+    },
+    # RECORD UPDATES  ***
+    "update": {
+        # Arguments -> updated records, total, unchanged, errors, records/sec
+        "progress": "\tUpdate records @ {} / {} @ Unchanged: {} - Errors: {} @ {} records/sec",
+    },
+    # CACHE         ***
+    "cache": {
+        # Arguments -> cache name, hits, negative hits, misses, coalesced, size
+        "stats": "{} cache -> hits: {} - not found: {} - misses: {} - coalesced: {} - size: {}",
+        # Arguments -> files restored, files added, size in MB
+        "files": "File cache -> restored: {} - added: {} - size: {} MB",
+    },
+    # FILE TRANSFERS  ***
+    "files": {
+        # Arguments -> direction, files, failed, MB, MB/sec
+        "transfers": "File {}s @ Files: {} - Failed: {} @ {} MB @ {} MB/sec",
+    },
 }
 
 
@@ -129,12 +162,69 @@ class Reports:
         arguments.append(add_spaces(global_counters["metadata"]["error"]))
         arguments.append(add_spaces(global_counters["file"]["error"]))
         arguments.append(add_spaces(global_counters["delete"]["error"]))
+        arguments.append(add_spaces(global_counters["unchanged"]))
         self.add_template(report_files, ["general", "summary"], arguments)
 
         if global_counters["http_responses"]:
             http_response_str = self.metadata_http_responses(global_counters)
             self.add(http_response_str, report_files)
 
+    def summary_connections(self, report_files, api_name, connection_stats):
+        """Reports how many requests reused an already open connection."""
+        arguments = [
+            api_name,
+            add_spaces(connection_stats["requests"]),
+            add_spaces(connection_stats["connections"]),
+            add_spaces(connection_stats["reused"]),
+        ]
+        self.add_template(report_files, ["http", "connections"], arguments)
+
+    def summary_cache(self, report_files, cache_name, cache_stats):
+        """Reports how many lookups were answered by a cache."""
+        arguments = [
+            cache_name,
+            add_spaces(cache_stats["hits"]),
+            add_spaces(cache_stats["negative_hits"]),
+            add_spaces(cache_stats["misses"]),
+            add_spaces(cache_stats["coalesced"]),
+            add_spaces(cache_stats["size"]),
+        ]
+        self.add_template(report_files, ["cache", "stats"], arguments)
+
+    def summary_file_cache(self, report_files, cache_stats):
+        """Reports how many files were not downloaded again from Pure."""
+        arguments = [
+            add_spaces(cache_stats["hits"]),
+            add_spaces(cache_stats["added"]),
+            add_spaces(round(cache_stats["size"] / 1024 ** 2)),
+        ]
+        self.add_template(report_files, ["cache", "files"], arguments)
+
+    def summary_file_transfers(self, report_files, transfer_stats):
+        """Reports the files downloaded and uploaded, and their throughput."""
+        for direction, stats in transfer_stats.items():
+            arguments = [
+                direction,
+                add_spaces(stats["files"]),
+                add_spaces(stats["failed"]),
+                add_spaces(round(stats["bytes"] / 1024 ** 2, 1)),
+                add_spaces(round(stats["throughput"] / 1024 ** 2, 2)),
+            ]
+            self.add_template(report_files, ["files", "transfers"], arguments)
+
+    def summary_pipeline(self, report_files, stages_stats):
+        """Reports the counters and the throughput of each pipeline stage."""
+        for stats in stages_stats:
+            arguments = [
+                stats["name"],
+                add_spaces(stats["workers"]),
+                add_spaces(stats["processed"]),
+                add_spaces(stats["produced"]),
+                add_spaces(stats["errors"]),
+                stats["throughput"],
+            ]
+            self.add_template(report_files, ["pipeline", "stage"], arguments)
+
     def pages_single_line(self, global_counters, pag, pag_size):
         """Adds to pages report log a summary of the page submission to RDM."""
         current_time = datetime.now().strftime("%H:%M:%S")
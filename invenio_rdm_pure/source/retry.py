@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Retries with exponential backoff, jitter and retry budgets."""
+
+import random
+import threading
+import time
+from typing import Callable, Tuple, Type
+
+
+class RetryBudget:
+    """Limits the retries of a whole task to a share of its requests.
+
+    Every first attempt deposits *ratio* retries, every retry withdraws one.
+    When a remote service is down, the workers stop retrying once the budget
+    is spent instead of multiplying the load on the service.
+    """
+
+    def __init__(self, ratio: float, minimum: int = 10):
+        """*minimum*: retries available before any request is sent."""
+        self.ratio = ratio
+        self.balance = float(minimum)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Called for every first attempt."""
+        with self._lock:
+            self.balance += self.ratio
+
+    def withdraw(self) -> bool:
+        """Takes one retry from the budget, False if it is spent."""
+        with self._lock:
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            return True
+
+
+class RetryPolicy:
+    """Repeats a failed call after exponentially growing, jittered delays."""
+
+    def __init__(
+        self,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        retry_on: Tuple[Type[Exception], ...] = (),
+    ):
+        """At most *max_attempts* calls, waiting ~base_delay * 2^n in between.
+
+        *retry_on*: exceptions raised by the call that are retried, as a None
+        result is (e.g. connection errors and timeouts).
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+
+    def delay(self, attempt: int) -> float:
+        """Wait before the given retry (full jitter, between 0 and the backoff)."""
+        backoff = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return random.uniform(0, backoff)
+
+    def call(self, function: Callable, budget: RetryBudget = None):
+        """Calls *function* until it returns something other than None.
+
+        Returns None when all attempts failed or the retry budget is spent.
+        """
+        if budget:
+            budget.deposit()
+
+        for attempt in range(self.max_attempts):
+            if attempt > 0:
+                if budget and not budget.withdraw():
+                    return None
+                time.sleep(self.delay(attempt - 1))
+
+            try:
+                result = function()
+            except self.retry_on:
+                result = None
+            if result is not None:
+                return result
+        return None
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Pooled, keep-alive HTTP sessions shared by the Pure and RDM requests."""
+
+import threading
+
+import requests
+from requests import Response
+from requests.adapters import HTTPAdapter
+
+
+class StreamedBody:
+    """Request body streamed from the body of a response, e.g. from Pure to RDM.
+
+    The request gets the Content-Length of the response when it is known,
+    otherwise it is sent with chunked transfer encoding.
+    """
+
+    def __init__(self, response: Response, chunk_size: int, digest_check=None):
+        """*response* was sent with stream=True, its content is not read yet.
+
+        *digest_check*: DigestCheck of the content. The last chunk is only
+        sent if the content matches, otherwise DigestMismatch is raised and the
+        request is not completed.
+        """
+        self.response = response
+        self.chunk_size = chunk_size
+        self.digest_check = digest_check
+        length = response.headers.get("Content-Length")
+        # A compressed response is decoded while read, its length changes
+        if length and "Content-Encoding" not in response.headers:
+            self.len = int(length)
+
+    def __iter__(self):
+        """Chunks of the response, read as they are sent."""
+        if not self.digest_check:
+            yield from self.response.iter_content(self.chunk_size)
+            return
+
+        # Each chunk is held back until the next one is read
+        previous = None
+        for chunk in self.response.iter_content(self.chunk_size):
+            self.digest_check.update(chunk)
+            if previous is not None:
+                yield previous
+            previous = chunk
+        self.digest_check.verify()
+        if previous is not None:
+            yield previous
+
+
+class PooledSession:
+    """Thread-safe HTTP client backed by a shared keep-alive connection pool.
+
+    Every thread gets its own ``requests.Session`` (sessions hold mutable state
+    like cookies), but all of them mount the same adapter, therefore the
+    underlying urllib3 connection pools are shared between the threads.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int,
+        pool_maxsize: int,
+        timeout=None,
+        verify: bool = True,
+    ):
+        """Creates the adapter holding one connection pool per host.
+
+        *pool_connections* is the number of hosts whose pools are kept open,
+        *pool_maxsize* the number of keep-alive connections kept per host.
+        """
+        self.timeout = timeout
+        self.verify = verify
+        # pool_block: threads wait for a free connection instead of opening
+        # throw-away connections once the pool of a host is exhausted
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,
+        )
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """Session of the current thread."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", self._adapter)
+            session.mount("https://", self._adapter)
+            session.verify = self.verify
+            self._local.session = session
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> Response:
+        """Sends a request reusing, when possible, an open connection."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> Response:
+        """Sends a GET request."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> Response:
+        """Sends a POST request."""
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> Response:
+        """Sends a PUT request."""
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> Response:
+        """Sends a DELETE request."""
+        return self.request("DELETE", url, **kwargs)
+
+    def connection_stats(self) -> dict:
+        """Number of requests sent and connections opened, per host and in total.
+
+        Every request that did not need a new connection reused a kept-alive one.
+        """
+        stats = {"requests": 0, "connections": 0, "reused": 0, "hosts": {}}
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host_stats = {
+                "requests": pool.num_requests,
+                "connections": pool.num_connections,
+                "reused": max(pool.num_requests - pool.num_connections, 0),
+            }
+            stats["hosts"][pool.host] = host_stats
+            for name in ("requests", "connections", "reused"):
+                stats[name] += host_stats[name]
+        return stats
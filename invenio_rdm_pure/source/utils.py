@@ -49,11 +49,28 @@ def initialize_counters():
             "error": 0,
         },
         "total": 0,
+        # Records not sent to RDM, unchanged since they were last sent
+        "unchanged": 0,
         "http_responses": {},
     }
     return global_counters
 
 
+def merge_counters(counters_list: list):
+    """Sums up the counters of several tasks (see initialize_counters)."""
+    global_counters = initialize_counters()
+    for counters in counters_list:
+        for key in ("metadata", "file", "delete"):
+            for result in counters[key]:
+                global_counters[key][result] += counters[key][result]
+        global_counters["total"] += counters["total"]
+        global_counters["unchanged"] += counters["unchanged"]
+        for status_code, count in counters["http_responses"].items():
+            http_responses = global_counters["http_responses"]
+            http_responses[status_code] = http_responses.get(status_code, 0) + count
+    return global_counters
+
+
 def current_time():
     """Description."""
     return datetime.now().strftime("%H:%M:%S")
@@ -165,26 +182,6 @@ def get_value(item, path: list):
     return value
 
 
-def get_userid_from_list_by_externalid(self, external_id: str, file_data: list):
-    """Given a user external_id, it checks if it is listed in data/user_ids_match.txt.
-
-    If it is found it returns its relative user id.
-    """
-    for line in file_data:
-        line = line.split("\n")[0]
-        line = line.split(" ")
-
-        # Checks if at least one of the ids match
-        if external_id == line[2]:
-            user_id = line[0]
-            user_id_spaces = add_spaces(user_id)
-
-            report = f"\tRDM owner list @@ User id:     {user_id_spaces} @ externalId: {external_id}"
-            self.reports.add(report)
-
-            return user_id
-
-
 def send_email(uuid: str, file_name: str):
     """Description."""
     # creates SMTP session
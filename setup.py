@@ -19,6 +19,9 @@ tests_require = [
 ]
 
 extras_require = {
+    "async": [
+        "aiohttp>=3.7.0",
+    ],
     "docs": [
         "Sphinx>=1.5.1",
     ],
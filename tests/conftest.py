@@ -10,6 +10,9 @@
 See https://pytest-invenio.readthedocs.io/ for documentation on which test
 fixtures are available.
 """
+
+import io
+import json
 import os
 import shutil
 import tempfile
@@ -21,8 +24,16 @@ from invenio_access import InvenioAccess
 from invenio_accounts import InvenioAccounts
 from invenio_config import InvenioConfigDefault
 from invenio_db import InvenioDB, db
+from requests import Response
 
 from invenio_rdm_pure import InvenioRdmPure
+from invenio_rdm_pure.setup import data_files_name
+from invenio_rdm_pure.source import reports
+from invenio_rdm_pure.source.rdm import add_record, delete_record
+from invenio_rdm_pure.source.rdm.database import RdmDatabase
+from invenio_rdm_pure.source.rdm.payload_hashes import PayloadHashes
+from invenio_rdm_pure.source.rdm.record_index import RecordIndex
+from invenio_rdm_pure.source.rdm.requests_rdm import Requests
 from invenio_rdm_pure.views import blueprint
 
 
@@ -87,3 +98,89 @@ def base_app(request):
     app.test_request_context().push()
 
     return app
+
+
+@pytest.fixture()
+def http_response():
+    """Factory of responses, as returned by requests.
+
+    *content* is sent as it is if bytes, otherwise as JSON. *stream* is read
+    while the response is used, as with stream=True.
+    """
+
+    def factory(
+        status_code: int = 200,
+        content=None,
+        headers: dict = None,
+        stream: bytes = None,
+    ) -> Response:
+        response = Response()
+        response.status_code = status_code
+        response.headers.update(headers or {})
+        if stream is not None:
+            response.raw = io.BytesIO(stream)
+        elif content is not None:
+            if not isinstance(content, bytes):
+                content = json.dumps(content).encode()
+            response._content = content
+        return response
+
+    return factory
+
+
+@pytest.fixture()
+def report_files(monkeypatch, tmp_path):
+    """Writes the report logs to a temporary directory, not to reports/."""
+    monkeypatch.setattr(reports, "dirpath", str(tmp_path))
+    monkeypatch.setattr(reports, "reports_full_path", f"{tmp_path}/reports/")
+    for name in reports.log_files_name:
+        monkeypatch.setitem(
+            reports.log_files_name, name, str(tmp_path / "reports" / f"{name}.log")
+        )
+    return tmp_path / "reports"
+
+
+@pytest.fixture()
+def rdm_posts(monkeypatch, tmp_path, http_response, report_files):
+    """Payloads posted by RdmAddRecord to a fake RDM, in order.
+
+    Older records are deleted without error. The RDM database, the local
+    stores and data files are replaced as well, the orcids and files are not
+    requested concurrently.
+    """
+    posts = []
+
+    def post_metadata(self, data):
+        posts.append(json.loads(data))
+        return http_response(201, {"id": f"recid-{len(posts):05d}"})
+
+    monkeypatch.setattr(Requests, "post_metadata", post_metadata)
+    monkeypatch.setattr(
+        Requests, "delete_metadata", lambda self, recid: http_response(204)
+    )
+    monkeypatch.setattr(RdmDatabase, "get_pure_user_id", lambda self: 1)
+    monkeypatch.setattr(add_record, "pure_async_requests", False)
+    record_index = RecordIndex(str(tmp_path / "records.db"))
+    monkeypatch.setattr(add_record, "record_index", record_index)
+    monkeypatch.setattr(delete_record, "record_index", record_index)
+    monkeypatch.setattr(
+        add_record, "payload_hashes", PayloadHashes(str(tmp_path / "payloads.db"))
+    )
+    for name in ("transfer_uuid_list", "delete_recid_list"):
+        monkeypatch.setitem(data_files_name, name, str(tmp_path / f"{name}.txt"))
+    return posts
+
+
+@pytest.fixture()
+def research_output():
+    """Factory of Pure research outputs without persons, units or files."""
+
+    def factory(uuid: str, title: str = "Title") -> dict:
+        return {
+            "uuid": uuid,
+            "title": title,
+            "openAccessPermissions": [{"value": "Open"}],
+            "languages": [{"value": "English"}],
+        }
+
+    return factory
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Add record tests."""
+
+from flask import Flask
+
+from invenio_rdm_pure.source.rdm import add_record
+from invenio_rdm_pure.source.rdm.add_record import RdmAddRecord
+from invenio_rdm_pure.source.utils import initialize_counters
+
+
+def pure_file(digest: str = None, size: str = "10") -> dict:
+    """Electronic version of a Pure research output."""
+    file = {"fileName": "thesis.pdf", "fileURL": "https://pure/thesis.pdf"}
+    file["size"] = size
+    if digest:
+        file.update(digest=digest, digestAlgorithm="SHA256")
+    return {"file": file}
+
+
+def test_rdm_file_review_digest(monkeypatch, http_response) -> None:
+    """Test that the files are matched on their digest, on their size without."""
+    record = {
+        "versionFiles": [{"name": "thesis.pdf", "size": 10, "internalReview": True}],
+        "extensions": {
+            "tug:file_name": "thesis.pdf",
+            "tug:file_digest": "ABCDEF",
+            "tug:file_digestAlgorithm": "SHA256",
+        },
+    }
+    search = {"hits": {"hits": [{"metadata": record}], "total": 1}}
+    adder = RdmAddRecord()
+    monkeypatch.setattr(
+        adder.rdm_requests,
+        "get_metadata",
+        lambda params: http_response(content=search),
+    )
+    adder.uuid = "uuid-1"
+    adder.rdm_file_review = []
+
+    with Flask(__name__).app_context():
+        adder._get_rdm_file_review()
+    rdm_file = adder.rdm_file_review[0]
+    assert rdm_file["digest"] == "ABCDEF"
+
+    assert adder._same_file(pure_file("abcdef", "20"), rdm_file)
+    assert not adder._same_file(pure_file("012345", "10"), rdm_file)
+    assert adder._same_file(pure_file(None, "10"), rdm_file)
+    assert not adder._same_file(pure_file(None, "20"), rdm_file)
+
+
+def test_unchanged_record_files_not_requested(
+    monkeypatch, rdm_posts, research_output
+) -> None:
+    """Test that the files of an unchanged record are not requested again."""
+    requested = []
+
+    class AsyncClient:
+        available = True
+
+        def get_pure_file(self, config, file_url, file_name, *digest):
+            requested.append(("async", file_name))
+
+        def run(self, *coroutines):
+            # Every concurrent request failed, sent again one by one
+            return [None] * len(coroutines)
+
+    def get_pure_file(file_url, file_name, digest, digest_algorithm):
+        requested.append(("sync", file_name))
+        return True
+
+    monkeypatch.setattr(add_record, "pure_async_requests", True)
+    monkeypatch.setattr(add_record, "pure_async_client", AsyncClient())
+    monkeypatch.setattr(add_record, "get_pure_config", lambda: {})
+    monkeypatch.setattr(add_record, "get_pure_file", get_pure_file)
+    monkeypatch.setattr(add_record, "file_transfer_mode", "disk")
+    monkeypatch.setattr(add_record.file_cache, "restore", lambda *args: False)
+    monkeypatch.setattr(RdmAddRecord, "_get_rdm_file_review", lambda self: None)
+    monkeypatch.setattr(RdmAddRecord, "_upload_file", lambda self, *args: True)
+
+    item = research_output("uuid-1")
+    item["electronicVersions"] = [pure_file("abcdef")]
+    item["additionalFiles"] = [pure_file("012345")]
+    item["additionalFiles"][0]["file"]["fileName"] = "data.csv"
+    counters = initialize_counters()
+    with Flask(__name__).app_context():
+        adder = RdmAddRecord()
+        assert adder.create_invenio_data(counters, item) is True
+        assert sorted(requested) == [
+            ("async", "data.csv"),
+            ("async", "thesis.pdf"),
+            ("sync", "data.csv"),
+            ("sync", "thesis.pdf"),
+        ]
+
+        requested.clear()
+        assert adder.create_invenio_data(counters, item) is True
+    assert requested == []
+    assert len(rdm_posts) == 1
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Asynchronous Pure client tests."""
+
+import asyncio
+
+import pytest
+
+from invenio_rdm_pure.source.pure.async_client import AsyncPureClient
+from invenio_rdm_pure.source.retry import RetryPolicy
+
+web = pytest.importorskip("aiohttp.web")
+
+
+def test_async_client() -> None:
+    """Test the concurrency limit, retries and the Pure requests."""
+    state = {"running": 0, "max_running": 0, "flaky": 0}
+
+    async def person(request):
+        state["running"] += 1
+        state["max_running"] = max(state["max_running"], state["running"])
+        await asyncio.sleep(0.05)
+        state["running"] -= 1
+        uuid = request.match_info["uuid"]
+        if uuid == "flaky":
+            state["flaky"] += 1
+            if state["flaky"] == 1:
+                return web.Response(status=503)
+        assert request.headers["api-key"] == "key"
+        return web.json_response({"orcid": f"orcid-{uuid}"})
+
+    async def research_outputs(request):
+        offset = int(request.query["offset"])
+        return web.json_response({"items": [offset, offset + 1]})
+
+    app = web.Application()
+    app.router.add_get("/api/persons/{uuid}", person)
+    app.router.add_get("/api/research-outputs", research_outputs)
+    runner = web.AppRunner(app)
+
+    async def start():
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        return site._server.sockets[0].getsockname()[1]
+
+    client = AsyncPureClient(3, (5, 5), RetryPolicy(3, 0, 0))
+    try:
+        (port,) = client.run(start())
+        config = {"api_url": f"http://127.0.0.1:{port}/api/", "api_key": "key"}
+
+        uuids = [str(i) for i in range(8)] + ["flaky"]
+        responses = client.run(
+            *[client.get_pure_metadata(config, "persons", uuid) for uuid in uuids]
+        )
+        assert [response.status_code for response in responses] == [200] * 9
+        assert responses[-1].content == b'{"orcid": "orcid-flaky"}'
+        assert state["max_running"] == 3
+        assert state["flaky"] == 2
+
+        (items,) = client.run(client.get_research_outputs(config, 2, 10))
+        assert items == [10, 11]
+        client.run(runner.cleanup())
+    finally:
+        client.close()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Lookup cache tests."""
+
+import threading
+import time
+
+import pytest
+
+from invenio_rdm_pure.source.cache import LookupCache, LookupFailed
+
+
+def test_lookup_cache(tmp_path) -> None:
+    """Test hits, negative caching, eviction and persistence."""
+    file_name = str(tmp_path / "cache.json")
+    requested = []
+
+    def loader(key):
+        requested.append(key)
+        if key == "error":
+            raise LookupFailed("Pure not available")
+        return None if key == "no-orcid" else f"orcid-{key}"
+
+    cache = LookupCache(file_name, 2, 60, 60)
+    assert cache.get("a", loader) == "orcid-a"
+    assert cache.get("a", loader) == "orcid-a"
+    assert cache.get("no-orcid", loader) is None
+    assert cache.get("no-orcid", loader) is None
+    with pytest.raises(LookupFailed):
+        cache.get("error", loader)
+    assert requested == ["a", "no-orcid", "error"]
+
+    # "a" is the least recently used
+    cache.get("b", loader)
+    assert cache.stats() == {
+        "hits": 1,
+        "negative_hits": 1,
+        "misses": 4,
+        "coalesced": 0,
+        "size": 2,
+    }
+
+    cache.save()
+    restarted = LookupCache(file_name, 2, 60, 60)
+    assert restarted.get("b", loader) == "orcid-b"
+    assert restarted.get("no-orcid", loader) is None
+    assert requested == ["a", "no-orcid", "error", "b"]
+
+
+def test_single_flight(tmp_path) -> None:
+    """Test that concurrent lookups of the same key share one request."""
+    requested = []
+
+    def loader(key):
+        requested.append(key)
+        time.sleep(0.1)
+        return f"orcid-{key}"
+
+    cache = LookupCache(str(tmp_path / "cache.json"), 10, 60, 60)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("a", loader)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["orcid-a"] * 5
+    assert requested == ["a"]
+    assert cache.stats()["coalesced"] == 4
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Synchronization checkpoint tests."""
+
+from invenio_rdm_pure.source.rdm.run.checkpoint import (
+    SynchronizationCheckpoint,
+    content_hash,
+)
+
+
+def test_checkpoint(tmp_path) -> None:
+    """Test that completed series survive a restart until cleared."""
+    db_file = str(tmp_path / "checkpoint.db")
+    checkpoint = SynchronizationCheckpoint(db_file)
+    series_hash = content_hash([{"uuid": "uuid-1"}, {"uuid": "uuid-2"}])
+    checkpoint.complete(100, 0, 2, series_hash)
+    checkpoint.complete(100, 100, 0, content_hash([]))
+
+    restarted = SynchronizationCheckpoint(db_file)
+    assert restarted.completed_series() == {(100, 0), (100, 100)}
+    assert restarted.get(100, 0)["content_hash"] == series_hash
+    assert restarted.get(100, 200) is None
+
+    restarted.clear()
+    assert restarted.completed_series() == set()
+
+
+def test_content_hash() -> None:
+    """Test that the hash does not depend on the order of the keys."""
+    assert content_hash([{"a": 1, "b": 2}]) == content_hash([{"b": 2, "a": 1}])
+    assert content_hash([{"a": 1}]) != content_hash([{"a": 2}])
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""RDM database queries tests."""
+
+import pytest
+from sqlalchemy import create_engine
+
+from invenio_rdm_pure.source.rdm.database import RdmDatabase
+
+
+@pytest.fixture()
+def rdm_db(tmp_path):
+    """RdmDatabase on a SQLite database with some users."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'rdm.db'}")
+    with engine.connect() as connection:
+        connection.execute("CREATE TABLE accounts_user (id INTEGER, email TEXT)")
+        connection.execute(
+            "INSERT INTO accounts_user VALUES (?, ?)",
+            [(i, f"user{i}@tugraz.at") for i in range(1, 11)],
+        )
+    return RdmDatabase(engine)
+
+
+def test_select_query(rdm_db) -> None:
+    """Test that filter values are bound, not written in the query."""
+    assert rdm_db.select_query("id", "accounts_user", {"email": "user3@tugraz.at"})
+    assert not rdm_db.select_query("id", "accounts_user", {"email": "' OR '1' = '1"})
+    with pytest.raises(ValueError):
+        rdm_db.select_query("id", "accounts_user; DROP TABLE accounts_user")
+
+
+def test_select_in(rdm_db) -> None:
+    """Test that the values are looked up in batches."""
+    emails = rdm_db.get_user_emails([2, 4, 4, 9, 42])
+    assert emails == {2: "user2@tugraz.at", 4: "user4@tugraz.at", 9: "user9@tugraz.at"}
+
+    rows = rdm_db.select_in("id", "accounts_user", "id", range(10), batch_size=3)
+    assert sorted(row[0] for row in rows) == list(range(1, 10))
+
+
+def test_iterate_query(rdm_db) -> None:
+    """Test that all rows are streamed."""
+    rows = list(rdm_db.iterate_query("id, email", "accounts_user", fetch_size=3))
+    assert len(rows) == 10
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Debug capture tests."""
+
+import gzip
+import json
+
+from invenio_rdm_pure.source.debug_capture import DebugCapture
+
+
+def test_debug_capture(tmp_path, http_response) -> None:
+    """Test that the requests are appended to the trace only when enabled."""
+    file_name = str(tmp_path / "trace" / "debug_trace.jsonl.gz")
+
+    disabled = DebugCapture(file_name, False, 10)
+    disabled.add(
+        "pure_get", "https://pure/ws/api/persons", http_response(content=b"{}")
+    )
+    disabled.close()
+    assert not (tmp_path / "trace").exists()
+
+    for _ in range(2):
+        capture = DebugCapture(file_name, True, 10)
+        capture.add(
+            "rdm_post", "https://rdm/api/records", http_response(content=b"ok"), b"{}"
+        )
+        capture.flush()
+        capture.close()
+
+    with gzip.open(file_name, "rt", encoding="utf-8") as fp:
+        lines = [json.loads(line) for line in fp]
+    assert len(lines) == 2
+    assert lines[0]["name"] == "rdm_post"
+    assert lines[0]["request"] == "{}"
+    assert lines[0]["response"] == "ok"
+    assert lines[0]["status"] == 200
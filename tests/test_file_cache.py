@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""File cache tests."""
+
+import hashlib
+import os
+
+import pytest
+
+from invenio_rdm_pure.source.file_cache import (
+    DigestCheck,
+    DigestMismatch,
+    FileCache,
+    hash_name,
+)
+from invenio_rdm_pure.source.sessions import StreamedBody
+
+
+def test_digest_check() -> None:
+    """Test that the digest is checked chunk after chunk."""
+    digest = hashlib.md5(b"abcdef").hexdigest()
+    assert hash_name("SHA-1") == "sha1"
+    assert hash_name("unknown") is None
+
+    check = DigestCheck("MD5", digest.upper())
+    check.update(b"abc")
+    check.update(b"def")
+    check.verify()
+
+    check = DigestCheck("MD5", digest)
+    check.update(b"abc")
+    with pytest.raises(DigestMismatch):
+        check.verify()
+
+    # Not supported, nothing to check
+    DigestCheck("unknown", digest).verify()
+
+
+def test_file_cache(tmp_path) -> None:
+    """Test that files are restored by digest and evicted beyond the size."""
+    cache = FileCache(str(tmp_path / "cache"), 10)
+    downloaded = tmp_path / "downloaded.pdf"
+    restored = str(tmp_path / "restored.pdf")
+
+    downloaded.write_bytes(b"123456")
+    cache.add(str(downloaded), "SHA-1", "aa")
+    assert not cache.restore("SHA-1", "bb", restored)
+    assert not cache.restore("SHA-1", "../aa", restored)
+    assert cache.restore("SHA-1", "AA", restored)
+    with open(restored, "rb") as fp:
+        assert fp.read() == b"123456"
+
+    # The least recently used is removed
+    os.utime(str(tmp_path / "cache" / "sha1" / "aa"), (0, 0))
+    downloaded.unlink()
+    downloaded.write_bytes(b"7890")
+    cache.add(str(downloaded), "SHA-1", "cc")
+    downloaded.unlink()
+    downloaded.write_bytes(b"12")
+    cache.add(str(downloaded), "SHA-1", "dd")
+    assert not cache.contains("SHA-1", "aa")
+    assert cache.contains("SHA-1", "cc") and cache.contains("SHA-1", "dd")
+    assert cache.stats() == {"hits": 1, "added": 3, "size": 6}
+
+
+def test_streamed_body_digest(http_response) -> None:
+    """Test that the last chunk is not sent if the digest does not match."""
+
+    def body(content: bytes, digest: str) -> StreamedBody:
+        response = http_response(stream=content)
+        return StreamedBody(response, 2, DigestCheck("MD5", digest))
+
+    digest = hashlib.md5(b"abcde").hexdigest()
+    assert list(body(b"abcde", digest)) == [b"ab", b"cd", b"e"]
+
+    sent = []
+    with pytest.raises(DigestMismatch):
+        for chunk in body(b"abcdX", digest):
+            sent.append(chunk)
+    assert sent == [b"ab", b"cd"]
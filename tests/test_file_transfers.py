@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""File transfers tests."""
+
+import threading
+import time
+from functools import partial
+
+from flask import Flask, current_app
+
+from invenio_rdm_pure.source.file_transfers import FileTransfers
+from invenio_rdm_pure.source.retry import RetryPolicy
+
+
+def test_file_transfers() -> None:
+    """Test the global limit, the retries and the counters."""
+    state = {"running": 0, "max_running": 0}
+    attempts = {}
+    lock = threading.Lock()
+
+    def transfer(name):
+        assert current_app.name == __name__
+        with lock:
+            attempts[name] = attempts.get(name, 0) + 1
+            state["running"] += 1
+            state["max_running"] = max(state["max_running"], state["running"])
+        time.sleep(0.02)
+        with lock:
+            state["running"] -= 1
+        if name == "flaky" and attempts[name] == 1:
+            return None
+        return name != "denied"
+
+    transfers = FileTransfers(3, 2, RetryPolicy(3, 0, 0))
+    names = ["a", "b", "c", "flaky", "denied"]
+
+    with Flask(__name__).app_context():
+        results = transfers.run(
+            "upload", [(partial(transfer, name), 1024) for name in names]
+        )
+
+    assert results == [True, True, True, True, False]
+    assert attempts == {"a": 1, "b": 1, "c": 1, "flaky": 2, "denied": 1}
+    assert state["max_running"] == 2
+
+    stats = transfers.stats()["upload"]
+    assert stats["files"] == 4
+    assert stats["failed"] == 1
+    assert stats["bytes"] == 4096
+    assert stats["throughput"] > 0
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Language codes tests."""
+
+import pytest
+
+from invenio_rdm_pure.source.rdm.languages import get_iso6393_code, get_languages
+
+
+def test_get_iso6393_code() -> None:
+    """Test that case and whitespace variants of a name match."""
+    assert get_iso6393_code("English") == "eng"
+    assert get_iso6393_code("  german ") == "deu"
+    assert get_iso6393_code("Undefined/Unknown") is None
+    assert get_iso6393_code("") is None
+
+
+def test_languages_read_only() -> None:
+    """Test that the index is shared and can not be modified."""
+    assert get_languages() is get_languages()
+    with pytest.raises(TypeError):
+        get_languages()["english"] = "xxx"
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Pure paginator tests."""
+
+import pytest
+from flask import Flask
+
+from invenio_rdm_pure.source.pure import paginator
+from invenio_rdm_pure.source.pure.paginator import PurePaginator
+
+
+@pytest.fixture()
+def pure_response(http_response):
+    """Factory of Pure list responses with the given items and 'next' link."""
+
+    def factory(items: list, next_href: str = None, status_code=200):
+        content = {"count": len(items), "items": items}
+        if next_href:
+            content["navigationLinks"] = [{"ref": "next", "href": next_href}]
+        return http_response(status_code, content)
+
+    return factory
+
+
+def test_pages_by_number(monkeypatch, pure_response) -> None:
+    """Test that the next page numbers are requested until there is no next."""
+    requested = []
+
+    def get_pure_metadata(endpoint, identifier="", parameters={}, review=True):
+        page = parameters["page"]
+        requested.append(page)
+        next_href = f"https://pure/ws/api/persons?page={page + 1}" if page < 4 else None
+        return pure_response([page * 10 + i for i in range(2)], next_href)
+
+    monkeypatch.setattr(paginator, "get_pure_metadata", get_pure_metadata)
+
+    with Flask(__name__).app_context():
+        items = list(PurePaginator("persons", "", {"page": 1}).items())
+        assert items == [10, 11, 20, 21, 30, 31, 40, 41]
+        assert requested == [1, 2, 3, 4]
+
+        requested.clear()
+        pages = PurePaginator("persons", "", {"page": 2}, max_pages=2).pages()
+        assert [resp_json["items"][0] for _, resp_json in pages] == [20, 30]
+        assert requested == [2, 3]
+
+
+def test_pages_by_link(monkeypatch, pure_response) -> None:
+    """Test that the next link is followed and a failed request ends the pages."""
+    requested = []
+    responses = {
+        "2021-01-01": pure_response(["a"], "https://pure/ws/api/changes/token1"),
+        "token1": pure_response(["b"], "https://pure/ws/api/changes/token2"),
+        "token2": pure_response([], status_code=500),
+    }
+
+    def get_pure_metadata(endpoint, identifier="", parameters={}, review=True):
+        requested.append(identifier)
+        return responses[identifier]
+
+    monkeypatch.setattr(paginator, "get_pure_metadata", get_pure_metadata)
+
+    with Flask(__name__).app_context():
+        pages = list(PurePaginator("changes", "2021-01-01").pages())
+
+    assert requested == ["2021-01-01", "token1", "token2"]
+    assert [resp_json and resp_json["items"] for _, resp_json in pages] == [
+        ["a"],
+        ["b"],
+        None,
+    ]
+    assert pages[-1][0].status_code == 500
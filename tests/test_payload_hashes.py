@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Payload hashes tests."""
+
+from flask import Flask
+
+from invenio_rdm_pure.source.rdm.add_record import RdmAddRecord
+from invenio_rdm_pure.source.rdm.payload_hashes import PayloadHashes, payload_hash
+from invenio_rdm_pure.source.utils import initialize_counters
+
+
+def test_payload_hash() -> None:
+    """Test that only the content of the record and of its files counts."""
+    data = {"title": "Title", "uuid": "uuid-1", "metadataVersion": 1}
+    files = {"a.pdf": ("digest-a", 10), "b.pdf": ("digest-b", 20)}
+    value = payload_hash(data, files)
+
+    reordered = {"metadataVersion": 2, "uuid": "uuid-1", "title": "Title"}
+    assert payload_hash(reordered, dict(reversed(list(files.items())))) == value
+
+    assert payload_hash(dict(data, title="Other"), files) != value
+    assert payload_hash(data, dict(files, **{"a.pdf": ("digest-c", 10)})) != value
+    assert payload_hash(data, {}) != value
+
+
+def test_get_set_remove(tmp_path) -> None:
+    """Test that the last hash of a uuid is kept."""
+    hashes = PayloadHashes(str(tmp_path / "payload_hashes.db"))
+    assert hashes.get("uuid-1") is None
+
+    hashes.set("uuid-1", "hash-1")
+    hashes.set("uuid-1", "hash-2")
+    assert hashes.get("uuid-1") == "hash-2"
+
+    hashes.remove("uuid-1")
+    assert hashes.get("uuid-1") is None
+
+
+def test_unchanged_record_not_sent(rdm_posts, research_output) -> None:
+    """Test that a record is posted again only once its payload changed."""
+    counters = initialize_counters()
+    with Flask(__name__).app_context():
+        add_record = RdmAddRecord()
+        item = research_output("uuid-1")
+        assert add_record.create_invenio_data(counters, item) is True
+        assert add_record.create_invenio_data(counters, item) is True
+        assert len(rdm_posts) == 1
+        assert counters["unchanged"] == 1
+
+        changed = research_output("uuid-1", "Changed title")
+        assert add_record.create_invenio_data(counters, changed) is True
+        assert len(rdm_posts) == 2
+        assert counters["metadata"]["success"] == 2
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Pipeline tests."""
+
+import threading
+
+from invenio_rdm_pure.source.pipeline import Pipeline, Stage
+
+
+def test_pipeline() -> None:
+    """Test that every item goes through all stages."""
+    stored = []
+    lock = threading.Lock()
+
+    def fetch(page):
+        return [page * 10 + i for i in range(10)]
+
+    def convert(item):
+        if item == 42:
+            raise RuntimeError("Unhandled value type")
+        return [str(item)]
+
+    def store(item):
+        with lock:
+            stored.append(item)
+
+    pipeline = Pipeline(
+        [
+            Stage("fetch", fetch, 2, 2),
+            Stage("convert", convert, 3, 5),
+            Stage("store", store, 2, 5),
+        ]
+    )
+    pipeline.run(range(10))
+
+    assert sorted(stored, key=int) == [str(i) for i in range(100) if i != 42]
+    fetch_stats, convert_stats, store_stats = pipeline.stats()
+    assert fetch_stats["processed"] == 10
+    assert fetch_stats["produced"] == 100
+    assert convert_stats["errors"] == 1
+    assert store_stats["processed"] == 99
+
+
+def test_pipeline_on_error() -> None:
+    """Test that the failed items are passed to the error callback."""
+    errors = []
+
+    def convert(item):
+        if item % 2:
+            raise ValueError(f"Odd item {item}")
+        return [item]
+
+    pipeline = Pipeline(
+        [Stage("convert", convert, 2), Stage("store", lambda item: None)],
+        on_error=lambda stage, item, error: errors.append((stage, item, str(error))),
+    )
+    pipeline.run(range(4))
+
+    assert sorted(errors) == [
+        ("convert", 1, "Odd item 1"),
+        ("convert", 3, "Odd item 3"),
+    ]
+    assert pipeline.stats()[0]["errors"] == 2
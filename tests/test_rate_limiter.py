@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Rate limiter tests."""
+
+import time
+
+from invenio_rdm_pure.source.rate_limiter import RateLimiter
+
+
+def test_burst_is_not_paced(tmp_path) -> None:
+    """Test that a full bucket lets a burst through without waiting."""
+    limiter = RateLimiter(str(tmp_path / "state.json"), 3600, 5, 1, 10)
+    start = time.time()
+    for _ in range(5):
+        limiter.acquire()
+    assert time.time() - start < 0.5
+
+
+def test_state_is_shared(tmp_path) -> None:
+    """Test that two limiters on the same file draw from the same bucket."""
+    state_file = str(tmp_path / "state.json")
+    first = RateLimiter(state_file, 3600, 2, 1, 10)
+    second = RateLimiter(state_file, 3600, 2, 1, 10)
+    first.acquire()
+    first.acquire()
+    assert second._read_state()["tokens"] < 1
+
+
+def test_backoff(tmp_path, http_response) -> None:
+    """Test the wait after a 429 response."""
+    limiter = RateLimiter(str(tmp_path / "state.json"), 3600, 5, 2, 10)
+    assert limiter.backoff(http_response(429), 0) == 2
+    assert limiter.backoff(http_response(429), 2) == 8
+    assert limiter.backoff(http_response(429), 5) == 10
+    assert limiter.backoff(http_response(429, headers={"Retry-After": "3"}), 4) == 3
+    assert limiter._read_state()["blocked_until"] > time.time()
+
+
+def test_rate_limit_headers(tmp_path, http_response) -> None:
+    """Test that the bucket follows the budget announced by the server."""
+    limiter = RateLimiter(str(tmp_path / "state.json"), 3600, 5, 1, 10)
+    reset = time.time() + 60
+    headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset)}
+    limiter.update(http_response(headers=headers))
+    state = limiter._read_state()
+    assert state["tokens"] == 0
+    assert state["blocked_until"] == reset
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Local record index tests."""
+
+from invenio_rdm_pure.source.rdm.record_index import RecordIndex
+
+
+def test_add_and_remove(tmp_path) -> None:
+    """Test that the newest record of a uuid comes first."""
+    index = RecordIndex(str(tmp_path / "records.db"))
+    index.add("uuid-1", "aaaaa-00001")
+    index.add("uuid-1", "aaaaa-00002", 2)
+    index.add("uuid-2", "bbbbb-00001")
+
+    assert index.get_recids("uuid-1") == ["aaaaa-00002", "aaaaa-00001"]
+    assert index.get_uuid("bbbbb-00001") == "uuid-2"
+
+    index.remove("aaaaa-00002")
+    assert index.get_recids("uuid-1") == ["aaaaa-00001"]
+    assert index.get_recids("uuid-3") == []
+
+
+def test_import_records_list(tmp_path) -> None:
+    """Test the import of the old all_rdm_records.txt."""
+    records_list = tmp_path / "all_rdm_records.txt"
+    records_list.write_text(
+        "uuid-1 aaaaa-00001\nuuid-2 bbbbb-00001\nuuid-1 aaaaa-00002\n"
+    )
+    index = RecordIndex(str(tmp_path / "records.db"), str(records_list))
+
+    assert index.get_recids("uuid-1") == ["aaaaa-00002", "aaaaa-00001"]
+    assert index.all_recids() == ["aaaaa-00001", "bbbbb-00001", "aaaaa-00002"]
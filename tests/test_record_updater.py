@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Record updater tests."""
+
+import threading
+
+from flask import Flask
+from requests import ConnectionError
+
+from invenio_rdm_pure.source.rdm import record_updater
+from invenio_rdm_pure.source.rdm.record_updater import RecordUpdater
+
+
+def test_record_updater(monkeypatch, http_response, report_files) -> None:
+    """Test that failed updates are sent again and all records are counted."""
+    sent = []
+    lock = threading.Lock()
+
+    def put_metadata(recid, data):
+        with lock:
+            sent.append(recid)
+            attempts = sent.count(recid)
+        if recid == "broken" or (recid == "flaky" and attempts == 1):
+            raise ConnectionError()
+        if recid == "invalid":
+            return http_response(400)
+        return http_response(200)
+
+    monkeypatch.setattr(record_updater.Requests, "put_metadata", put_metadata)
+    monkeypatch.setattr(record_updater.RetryPolicy, "delay", lambda self, n: 0)
+
+    records = [{"recid": f"record-{i}"} for i in range(20)]
+    records += [{"recid": recid} for recid in ("flaky", "broken", "invalid", "same")]
+
+    def modify(record):
+        return None if record["recid"] == "same" else record
+
+    with Flask(__name__).app_context():
+        counters = RecordUpdater(["console"]).run(records, modify)
+
+    assert counters == {"total": 24, "updated": 21, "unchanged": 1, "errors": 2}
+    assert sent.count("flaky") == 2
+    assert sent.count("broken") == 3
+    assert sent.count("invalid") == 1
+    assert (report_files / "console.log").exists()
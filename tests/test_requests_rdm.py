@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""RDM search iteration tests."""
+
+import time
+
+import pytest
+from flask import Flask
+
+from invenio_rdm_pure.source.rdm import requests_rdm
+from invenio_rdm_pure.source.rdm.requests_rdm import Requests
+from invenio_rdm_pure.source.sessions import StreamedBody
+
+
+@pytest.fixture()
+def search_response(http_response):
+    """Factory of search responses with the given hits."""
+
+    def factory(hits: list, total, next_url: str = None):
+        links = {"next": next_url} if next_url else {}
+        return http_response(
+            content={"hits": {"hits": hits, "total": total}, "links": links}
+        )
+
+    return factory
+
+
+def test_iterate_metadata(monkeypatch, search_response) -> None:
+    """Test that all the pages are requested, by page number or next link."""
+    hits = [{"id": str(i)} for i in range(25)]
+    pages = []
+
+    def get_metadata(params, recid=""):
+        pages.append(params["page"])
+        start = (params["page"] - 1) * params["size"]
+        page_hits = hits[start : start + params["size"]]
+        return search_response(
+            page_hits, {"value": len(hits)}, "next" if start == 0 else None
+        )
+
+    def send(method, url, write=False, **kwargs):
+        pages.append(url)
+        return search_response(hits[10:20], len(hits))
+
+    monkeypatch.setattr(Requests, "get_metadata", staticmethod(get_metadata))
+    monkeypatch.setattr(Requests, "_send", staticmethod(send))
+
+    with Flask(__name__).app_context():
+        found = list(Requests().iterate_metadata({"q": "uuid"}, size=10))
+
+    assert found == hits
+    assert pages == [1, "next", 3]
+
+
+def test_iterate_metadata_window(monkeypatch, search_response, report_files) -> None:
+    """Test that the paging stops at the result window and early consumers."""
+    pages = []
+
+    def get_metadata(params, recid=""):
+        pages.append(params["page"])
+        return search_response([{"id": "x"}] * params["size"], 100)
+
+    monkeypatch.setattr(Requests, "get_metadata", staticmethod(get_metadata))
+    monkeypatch.setattr(requests_rdm, "rdm_search_max_results", 30)
+
+    with Flask(__name__).app_context():
+        assert len(list(Requests().iterate_metadata({}, size=10))) == 30
+        pages.clear()
+        monkeypatch.setattr(requests_rdm, "rdm_search_max_results", 10000)
+        iterator = Requests().iterate_metadata({}, size=10)
+        assert next(iterator) == {"id": "x"}
+        time.sleep(0.2)
+        iterator.close()
+
+    # The page being processed, the one waiting in the queue and the one
+    # waiting for a free place in it
+    assert pages == [1, 2, 3]
+
+
+def test_put_file_content(
+    monkeypatch, tmp_path, http_response, search_response, report_files
+) -> None:
+    """Test that a file is sent again after a 429 and a streamed body is not."""
+    bodies = []
+
+    def request(method, url, data=None, **kwargs):
+        if isinstance(data, StreamedBody):
+            bodies.append((b"".join(data), data.len))
+        else:
+            bodies.append(data.read())
+        return search_response([], 0) if len(bodies) > 1 else http_response(429)
+
+    monkeypatch.setattr(Requests.session, "request", request)
+    monkeypatch.setattr(Requests.rate_limiter, "acquire", lambda: None)
+    monkeypatch.setattr(Requests.rate_limiter, "update", lambda response: None)
+    monkeypatch.setattr(Requests.rate_limiter, "backoff", lambda response, n: 0)
+
+    app = Flask(__name__)
+    app.config["INVENIO_PURE_RECORD_URL"] = "https://rdm/api/records/{}"
+    file_path = tmp_path / "thesis.pdf"
+    file_path.write_bytes(b"x" * 10)
+
+    with app.app_context():
+        assert Requests().put_file(str(file_path), "abcde-12345").status_code == 200
+        assert bodies == [b"x" * 10, b"x" * 10]
+
+        bodies.clear()
+        pure_response = http_response(
+            stream=b"y" * 10, headers={"Content-Length": "10"}
+        )
+        body = StreamedBody(pure_response, 4)
+        response = Requests().put_file_content("data.csv", "abcde-12345", body)
+        assert response.status_code == 429
+        assert bodies == [(b"y" * 10, 10)]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Retry policy tests."""
+
+import pytest
+
+from invenio_rdm_pure.source.retry import RetryBudget, RetryPolicy
+
+
+def test_retry_until_success() -> None:
+    """Test that a call is repeated until it returns a result."""
+    results = iter([None, None, ["item"]])
+    policy = RetryPolicy(5, 0, 0)
+    assert policy.call(lambda: next(results)) == ["item"]
+
+
+def test_max_attempts() -> None:
+    """Test that a call is given up after the maximum attempts."""
+    calls = []
+    policy = RetryPolicy(3, 0, 0)
+    assert policy.call(lambda: calls.append(1)) is None
+    assert len(calls) == 3
+
+
+def test_retry_budget() -> None:
+    """Test that no retry is sent once the budget is spent."""
+    calls = []
+    budget = RetryBudget(0, minimum=1)
+    policy = RetryPolicy(5, 0, 0)
+    assert policy.call(lambda: calls.append(1), budget) is None
+    assert len(calls) == 2
+
+
+def test_delay() -> None:
+    """Test that the jittered delay stays below the exponential backoff."""
+    policy = RetryPolicy(5, 1, 10)
+    for attempt in range(6):
+        assert 0 <= policy.delay(attempt) <= min(10, 2**attempt)
+
+
+def test_retry_on_exceptions() -> None:
+    """Test that the given exceptions are retried, the others raised."""
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError()
+        return ["item"]
+
+    assert RetryPolicy(5, 0, 0, retry_on=(ConnectionError,)).call(flaky) == ["item"]
+    assert len(calls) == 3
+
+    calls.clear()
+    with pytest.raises(ConnectionError):
+        RetryPolicy(5, 0, 0).call(flaky)
+    assert len(calls) == 1
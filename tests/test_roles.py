@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Role cache tests."""
+
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, current_app
+from invenio_db import db
+from sqlalchemy.exc import OperationalError
+
+from invenio_rdm_pure.source.rdm import roles
+from invenio_rdm_pure.source.rdm.roles import (
+    RoleCache,
+    get_role_members,
+    update_role_members,
+)
+
+
+def test_role_cache(base_app) -> None:
+    """Test that missing roles are created in batches."""
+    role_cache = RoleCache(batch_size=2)
+    assert role_cache.add("1234", "Institute of Testing")
+    assert not role_cache.add("1234", "Institute of Testing")
+    assert role_cache.exists("1234")
+
+    # The second role completes the batch
+    assert role_cache.add("5678", "Institute of Caching")
+    datastore = current_app.extensions["security"].datastore
+    assert datastore.find_role("1234") is not None
+    assert datastore.find_role("5678") is not None
+
+    role_cache.add("9012", "Institute of Flushing")
+    assert datastore.find_role("9012") is None
+    assert role_cache.flush() == ["9012"]
+    assert datastore.find_role("9012") is not None
+
+    # A new cache reads the roles from the database
+    assert RoleCache(batch_size=2).exists("9012")
+
+
+def test_role_cache_rollback(monkeypatch) -> None:
+    """Test that a failed batch is rolled back, leaving the session usable."""
+    calls = []
+
+    def create_role(name, description):
+        raise OperationalError("INSERT", {}, Exception("connection lost"))
+
+    session = SimpleNamespace(
+        commit=lambda: calls.append("commit"), rollback=lambda: calls.append("rollback")
+    )
+    monkeypatch.setattr(roles, "db", SimpleNamespace(session=session))
+    app = Flask(__name__)
+    datastore = SimpleNamespace(create_role=create_role)
+    app.extensions["security"] = SimpleNamespace(datastore=datastore)
+
+    role_cache = RoleCache(batch_size=2)
+    role_cache._names = set()
+    role_cache.add("1234", "Institute of Testing")
+    with app.app_context(), pytest.raises(OperationalError):
+        role_cache.flush()
+    assert calls == ["rollback"]
+
+
+def test_update_role_members(base_app) -> None:
+    """Test that only the changed memberships are written."""
+    datastore = current_app.extensions["security"].datastore
+    users = [
+        datastore.create_user(email=f"user{i}@tugraz.at", active=True) for i in range(3)
+    ]
+    datastore.create_role(name="old")
+    datastore.create_role(name="new")
+    db.session.commit()
+    user_ids = {user.id for user in users}
+
+    counts = update_role_members(add={"old": user_ids})
+    assert counts == {"added": 3, "removed": 0, "unchanged": 0}
+
+    # Split: the members of the old group move to the new one
+    first_id = users[0].id
+    update_role_members(add={"new": [first_id]})
+    counts = update_role_members(add={"new": user_ids}, remove={"old": user_ids})
+    assert counts == {"added": 2, "removed": 3, "unchanged": 1}
+    assert get_role_members(["old", "new"]) == {
+        "old": {},
+        "new": {user.id: user.email for user in users},
+    }
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Synchronizer tests."""
+
+import pytest
+from flask import Flask
+from requests import ConnectionError
+
+from invenio_rdm_pure.source.rdm.run import synchronizer
+from invenio_rdm_pure.source.rdm.run.checkpoint import SynchronizationCheckpoint
+from invenio_rdm_pure.source.rdm.run.synchronizer import Synchronizer
+from invenio_rdm_pure.source.retry import RetryPolicy
+
+
+@pytest.fixture()
+def failed_file(monkeypatch, tmp_path, report_files):
+    """Failed series and checkpoint in tmp_path, retries without waiting."""
+    failed_file = tmp_path / "failed_research_outputs.txt"
+    monkeypatch.setitem(
+        synchronizer.data_files_name, "failed_research_outputs", str(failed_file)
+    )
+    checkpoint = SynchronizationCheckpoint(str(tmp_path / "checkpoint.db"))
+    monkeypatch.setattr(synchronizer, "synchronization_checkpoint", checkpoint)
+    monkeypatch.setattr(RetryPolicy, "delay", lambda self, attempt: 0)
+    with Flask(__name__).app_context():
+        yield failed_file
+
+
+def test_failed_series(monkeypatch, failed_file) -> None:
+    """Test that connection errors are retried, then the series is recorded."""
+    requested = []
+
+    def get_research_outputs(pure_api_key, pure_api_url, size, offset):
+        requested.append(offset)
+        if offset == 100 or requested.count(offset) == 1:
+            raise ConnectionError()
+        return []
+
+    monkeypatch.setattr(synchronizer, "get_research_outputs", get_research_outputs)
+    Synchronizer()._run_pipeline("key", "url", [(100, 0), (100, 100)])
+
+    assert requested.count(0) == 2
+    assert requested.count(100) == synchronizer.pure_retry_attempts
+    assert failed_file.read_text() == "100 100\n"
+
+
+def test_replay_failed_series(monkeypatch, failed_file) -> None:
+    """Test that only the series failing again are kept, even after a crash."""
+    failed_file.write_text("100 0\n100 100\n")
+
+    def crash(*args, **kwargs):
+        raise RuntimeError()
+
+    run_pipeline = Synchronizer._run_pipeline
+    monkeypatch.setattr(Synchronizer, "_run_pipeline", crash)
+    with pytest.raises(RuntimeError):
+        Synchronizer().replay_failed_research_outputs()
+    assert failed_file.read_text() == "100 0\n100 100\n"
+    monkeypatch.setattr(Synchronizer, "_run_pipeline", run_pipeline)
+
+    def get_research_outputs(pure_api_key, pure_api_url, size, offset):
+        if offset == 100:
+            raise ConnectionError()
+        return []
+
+    monkeypatch.setattr(synchronizer, "get_research_outputs", get_research_outputs)
+    Synchronizer().replay_failed_research_outputs()
+    assert failed_file.read_text() == "100 100\n"
+
+
+def test_checkpoint_resume(
+    monkeypatch, failed_file, rdm_posts, research_output
+) -> None:
+    """Test that a stored series is checkpointed and skipped while unchanged."""
+    research_outputs = [research_output(f"uuid-{i}") for i in range(3)]
+    monkeypatch.setattr(synchronizer, "get_research_output_count", lambda *args: 3)
+    monkeypatch.setattr(
+        synchronizer, "get_research_outputs", lambda *args: research_outputs
+    )
+
+    Synchronizer().run_initial_research_output_synchronization("key", "url")
+    assert len(rdm_posts) == 3
+    completed = synchronizer.synchronization_checkpoint.get(3, 0)
+    assert completed["item_count"] == 3
+
+    resumed = Synchronizer()
+    resumed.run_initial_research_output_synchronization("key", "url")
+    assert resumed.unchanged_series == 1
+
+    # The series is stored again, only the changed record is posted
+    research_outputs[0] = research_output("uuid-0", "Changed title")
+    resumed.run_initial_research_output_synchronization("key", "url")
+    assert resumed.unchanged_series == 0
+    assert len(rdm_posts) == 4
+
+
+def test_pipeline_error_reported(
+    monkeypatch, failed_file, report_files, research_output
+) -> None:
+    """Test that a record failing in the store stage is reported with its uuid."""
+    monkeypatch.setattr(
+        synchronizer,
+        "get_research_outputs",
+        lambda *args: [research_output("uuid-1")],
+    )
+
+    def create_invenio_data(self, counters, item):
+        raise KeyError("title")
+
+    monkeypatch.setattr(
+        synchronizer.RdmAddRecord, "create_invenio_data", create_invenio_data
+    )
+    Synchronizer()._run_pipeline("key", "url", [(1, 0)])
+
+    console = (report_files / "console.log").read_text()
+    assert "Pipeline store" in console
+    assert "Uuid: uuid-1" in console
+    assert "KeyError: 'title'" in console
+
+
+def test_failed_series_listed_once(monkeypatch, failed_file) -> None:
+    """Test that a series failing in several runs is replayed only once."""
+    requested = []
+
+    def get_research_outputs(pure_api_key, pure_api_url, size, offset):
+        requested.append(offset)
+        raise ConnectionError()
+
+    monkeypatch.setattr(synchronizer, "get_research_outputs", get_research_outputs)
+    Synchronizer()._run_pipeline("key", "url", [(100, 0)])
+    Synchronizer()._run_pipeline("key", "url", [(100, 0)])
+    assert failed_file.read_text() == "100 0\n"
+
+    failed_file.write_text("100 0\n100 0\n")
+    requested.clear()
+    Synchronizer().replay_failed_research_outputs()
+    assert requested == [0] * synchronizer.pure_retry_attempts
+    assert failed_file.read_text() == "100 0\n"
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2020 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""User ids match tests."""
+
+from invenio_rdm_pure.source.rdm.user_ids_match import UserIdsMatch
+
+
+def test_user_ids_match(tmp_path) -> None:
+    """Test the lookups and that changes to the file are read again."""
+    file_name = tmp_path / "user_ids_match.txt"
+    file_name.write_text("1 uuid-1 ext-1\n2 uuid-2 ext-2\n")
+    index = UserIdsMatch(str(file_name))
+
+    assert index.get_user_id("ext-2") == "2"
+    assert index.get_user_id("ext-3") is None
+    assert index.get_by_user_uuid("uuid-1") == ("1", "uuid-1", "ext-1")
+    assert index.contains(1, "uuid-1", "ext-1")
+    assert not index.contains(1, "uuid-1", "ext-2")
+
+    # Added by another process
+    with open(file_name, "a") as fp:
+        fp.write("3 uuid-3 ext-3\n")
+    assert index.get_user_id("ext-3") == "3"
+
+    index.add(4, "uuid-4", "ext-4")
+    assert index.get_by_user_id(4) == ("4", "uuid-4", "ext-4")